@@ -5,16 +5,11 @@ import logging
 
 from src.discord_bot import DiscordBot
 from src.utils.logger import setup_logger
-from src.utils.secrets import access_secret_version
-
-def main():
-    # Load ENV data
-    load_dotenv()
-    if (int(os.environ.get("PRODUCTION", 0)) == 1):
-        TOKEN = access_secret_version('DISCORD_TOKEN')
-    else:
-        TOKEN = os.getenv('DISCORD_TOKEN')
+from src.utils.database import DATABASE_SECRETS
+from src.utils.secrets import get_secrets
+from src.utils.cluster import launch_clusters, is_clustered
 
+def run_bot(TOKEN: str):
     # Intialize Bot
     intents = discord.Intents.default()
     intents.message_content = True
@@ -29,5 +24,18 @@ def main():
     # Run discord bot
     bot.run(TOKEN, root_logger=logger, log_level=logging.INFO)
 
+def main():
+    # Load ENV data
+    load_dotenv()
+
+    # Fetch every secret in one batch, the database reads its own from the cache later
+    TOKEN = get_secrets(['DISCORD_TOKEN'] + DATABASE_SECRETS)['DISCORD_TOKEN']
+
+    # Run one process per cluster, unless this already is a cluster's process
+    if (is_clustered() and "CLUSTER_ID" not in os.environ):
+        launch_clusters(run_bot, TOKEN)
+    else:
+        run_bot(TOKEN)
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,128 @@
+import os
+import sys
+import json
+import time
+from datetime import datetime
+
+from src.utils.web_scraper import parse_crunchyroll_events
+
+# Crunchyroll pages, each next to a json file with the year to parse with and the expected events.
+# The synthetic_ pages are generated to mimic the update page's layout, with filler navigation, news links and numbered
+# events, and are not recordings of it. A recorded copy of the page can be added under any other name the same way.
+FIXTURES_PATH = os.path.join(os.path.dirname(__file__), "fixtures", "crunchyroll")
+
+def parse_crunchyroll_events_baseline(content: bytes, year: int) -> list:
+    """
+    The original parser, using html.parser over the whole page and strptime, kept as the baseline to compare against.
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, 'html.parser')
+
+    content = soup.select('div.contents > ul')
+
+    if(not content):
+        return None
+
+    events = []
+
+    # Iterate through event and create dictionary
+    for li in content[-1].find_all('li', recursive=False):
+        try:
+            event = li.find(text = True).strip()
+
+            # Find opening bracket for date
+            startingBracket = -1
+            for i in range(len(event)-1,-1,-1):
+                if (event[i] == "("):
+                    startingBracket = i
+                    break
+
+            # Split crunchyroll event string into 2 parts
+            eventName, date = event[0:startingBracket].lstrip().rstrip(), event[startingBracket:].strip("(").strip(")").split()
+
+            # Check if it's a proper date: (MM/DD/YYYY TIME UTC) or (MM/DD TIME UTC)
+            if (date and (date[0].count("/") < 1 or len(date) < 3 or date[0].count("/") > 2)):
+                continue
+
+            # Add seconds to date
+            if (date[1].count(":")==1):
+                date[1] += ":00"
+
+            # Add current year to date if it does not exist, because it defaults to 1900
+            if (date[0].count('/') == 1):
+                date[0] += "/" + str(year)
+
+            startDate = datetime.strptime(" ".join(date[0:2]), '%m/%d/%Y %H:%M:%S')
+
+            # Check if there's an end date
+            if (len(date) == 7 and date[0].count("/") >= 1 and date[-3].count("/") >= 1):
+
+                # Add seconds to date
+                if (date[-2].count(":")==1):
+                    date[-2] += ":00"
+
+                # Add current year to date if it does not exist, because it defaults to 1900
+                if (date[-3].count("/")==1):
+                    date[-3] += "/" + str(year)
+
+                endDate = datetime.strptime(" ".join(date[4:-1]), '%m/%d/%Y %H:%M:%S')
+            else:
+                endDate = None
+
+            events.append({"event": eventName, "startDate": startDate, "endDate": endDate})
+        except Exception:
+            pass
+
+    return events
+
+def serialize_events(events: list) -> list:
+    if (events == None):
+        return None
+    return [{"event": event["event"],
+        "startDate": event["startDate"].isoformat(),
+        "endDate": event["endDate"].isoformat() if event["endDate"] else None} for event in events]
+
+def load_fixtures() -> list:
+    """
+    Returns (name, content, year, expected events) for every saved page.
+    """
+    fixtures = []
+    for filename in sorted(os.listdir(FIXTURES_PATH)):
+        if (filename.endswith(".html")):
+            with open(os.path.join(FIXTURES_PATH, filename), "rb") as file:
+                content = file.read()
+            with open(os.path.join(FIXTURES_PATH, f"{filename[:-5]}.json"), "r") as file:
+                expected = json.load(file)
+            fixtures.append((filename[:-5], content, expected["year"], expected["events"]))
+    return fixtures
+
+def time_parser(parse, iterations: int) -> float:
+    startedAt = time.perf_counter()
+    for _ in range(iterations):
+        parse()
+    return (time.perf_counter() - startedAt) / iterations * 1000
+
+def main() -> int:
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+
+    failed = False
+    print(f"{'fixture':<24} {'baseline ms':>12} {'parser ms':>10} {'speedup':>8}  result")
+    for name, content, year, expected in load_fixtures():
+        events = serialize_events(parse_crunchyroll_events(content, year)[0])
+        baseline = serialize_events(parse_crunchyroll_events_baseline(content, year))
+
+        result = "ok"
+        if (events != expected):
+            result = "differs from expected"
+        elif (baseline != expected):
+            result = "baseline differs from expected"
+        failed = failed or result != "ok"
+
+        baselineTime = time_parser(lambda: parse_crunchyroll_events_baseline(content, year), iterations)
+        parserTime = time_parser(lambda: parse_crunchyroll_events(content, year), iterations)
+        print(f"{name:<24} {baselineTime:>12.2f} {parserTime:>10.2f} {baselineTime / parserTime:>7.1f}x  {result}")
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -4,22 +4,33 @@ from discord.ext import tasks, commands
 from datetime import datetime, timedelta
 
 from src.discord_bot import DiscordBot
-from src.utils.web_scraper import WebScraper
 from src.services.event_service import EventService
+from src.services.ingestion_service import IngestionService
 from src.cogs.guild_cog import GuildCog
+from src.utils.broadcaster import Broadcaster
+from src.utils.scrape_scheduler import ScrapeScheduler
+from src.utils.cache import TTLCache, MISSING
 from src.utils.logger import setup_logger
+from src.utils.response import respond
 
 class InfoCog(commands.Cog):
     def __init__(self, bot: DiscordBot):
         self._bot = bot
-        self.princess_connect_daily_update.start()
+        # Events are stored for every cluster, so only the primary one scrapes them
+        if (bot.isPrimaryCluster):
+            self.princess_connect_daily_update.start()
         self.dailyNotifications.start()
         self._eventService = EventService()
+        self._embedCache = TTLCache(maxSize=128, ttl=3600)
+        self._broadcaster = Broadcaster()
+        self._ingestionService = IngestionService(eventService=self._eventService)
+        self._scrapeScheduler = ScrapeScheduler()
         self._logger = setup_logger('bot.cog.info', '/data/discord.log')
 
-    def cog_unload(self):
+    async def cog_unload(self):
         self.princess_connect_daily_update.cancel()
         self.dailyNotifications.cancel()
+        await self._ingestionService.close()
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -35,21 +46,16 @@ class InfoCog(commands.Cog):
         Displays current, oncoming, or ending events. Default command gets current events.
         """
         try:
-            results = await self._eventService.getCurrentEvents()
+            embed = await self.getEventEmbed(kind="current")
 
-            if (not results):
-                async with ctx.message.channel.typing():
-                    await ctx.reply("There are no current events.")
+            if (not embed):
+                await respond(ctx, "There are no current events.")
                 return
 
-            embed = self.createEventEmbed(ctx=ctx, title="Current Events", data=results, days=None, relative="endDate")
-            
-            async with ctx.message.channel.typing():
-                await ctx.reply(embed=embed)
+            await respond(ctx, embed=embed)
         except Exception as e:
             self._logger.error(e)
-            async with ctx.message.channel.typing():
-                await ctx.reply("Unable to get events.")
+            await respond(ctx, "Unable to get events.")
     
     @events.command(name="ending", with_app_command=True, description="Displays events ending soon.")
     async def events_ending(self, ctx: commands.context.Context, days:int=commands.parameter(default=1, description="The number of days from now.")):
@@ -58,25 +64,19 @@ class InfoCog(commands.Cog):
         """
         try:
             if (type(days) != int or days <= 0):
-                async with ctx.message.channel.typing():
-                    await ctx.reply("Please provide a valid number of days.")
+                await respond(ctx, "Please provide a valid number of days.")
                 return
 
-            results = await self._eventService.getEventsEnding(days)
+            embed = await self.getEventEmbed(kind="ending", days=days)
 
-            if (not results):
-                async with ctx.message.channel.typing():
-                    await ctx.reply(f"There are no events ending within {days} {'days' if days > 1 else 'day'}.")
+            if (not embed):
+                await respond(ctx, f"There are no events ending within {days} {'days' if days > 1 else 'day'}.")
                 return
 
-            embed = self.createEventEmbed(ctx=ctx, title="Events Ending", data=results, days=days, relative="endDate")
-            
-            async with ctx.message.channel.typing():
-                await ctx.reply(embed=embed)
+            await respond(ctx, embed=embed)
         except Exception as e:
             self._logger.error(e)
-            async with ctx.message.channel.typing():
-                await ctx.reply("Unable to get events.")
+            await respond(ctx, "Unable to get events.")
     
     @events.command(name="upcoming", with_app_command=True, description="Displays upcoming events.")
     async def events_upcoming(self, ctx: commands.context.Context, days:int=commands.parameter(default=1, description="The number of days from now.")):
@@ -85,24 +85,43 @@ class InfoCog(commands.Cog):
         """
         try:
             if (type(days) != int or days <= 0):
-                async with ctx.message.channel.typing():
-                    await ctx.reply("Please provide a valid number of days.")
+                await respond(ctx, "Please provide a valid number of days.")
                 return
 
-            results = await self._eventService.getEventsUpcoming(days)
+            embed = await self.getEventEmbed(kind="upcoming", days=days)
 
-            if (not results):
-                async with ctx.message.channel.typing():
-                    await ctx.reply(f"There are no future events within {days} {'days' if days > 1 else 'day'}.")
+            if (not embed):
+                await respond(ctx, f"There are no future events within {days} {'days' if days > 1 else 'day'}.")
                 return
 
-            embed = self.createEventEmbed(ctx=ctx, title="Upcoming Events", data=results, days=days, relative="startDate")
-            
-            await ctx.reply(embed=embed)
+            await respond(ctx, embed=embed)
         except Exception as e:
             self._logger.error(e)
-            async with ctx.message.channel.typing():
-                await ctx.reply("Unable to get events.")
+            await respond(ctx, "Unable to get events.")
+
+    async def getEventEmbed(self, kind: str, days: int = None) -> discord.embeds.Embed:
+        """
+        Returns the embed for an event query, or None if there are no events. Embeds are cached until the event set changes
+        or the next event boundary inside the queried window passes.
+        """
+        version, expiresIn = await self._eventService.getEventsCacheInfo(days=days)
+        key = (kind, days, version)
+
+        embed = self._embedCache.get(key)
+        if (embed is MISSING):
+            if (kind == "current"):
+                results = await self._eventService.getCurrentEvents()
+                embed = self.createEventEmbed(title="Current Events", data=results, days=None, relative="endDate") if results else None
+            elif (kind == "ending"):
+                results = await self._eventService.getEventsEnding(days)
+                embed = self.createEventEmbed(title="Events Ending", data=results, days=days, relative="endDate") if results else None
+            else:
+                results = await self._eventService.getEventsUpcoming(days)
+                embed = self.createEventEmbed(title="Upcoming Events", data=results, days=days, relative="startDate") if results else None
+
+            self._embedCache.set(key, embed, ttl=expiresIn)
+
+        return embed
 
     def createEventEmbed(self, title:str, data:str, ctx:commands.context.Context=None, days: int = None, relative:str=None):
         embed = discord.embeds.Embed(title=title, color=discord.Colour.blurple())
@@ -137,24 +156,41 @@ class InfoCog(commands.Cog):
 
         return embed
     
-    @tasks.loop(hours=24.0)
+    @tasks.loop(seconds=30)
     async def princess_connect_daily_update(self):
         """
-        This task sends daily reminders of soon to be ending or upcoming events within the next 2 days.
+        This task polls the event sources when the scrape scheduler says they are due, and cleans expired events.
         """
+        # Sleep till the next poll, which may already be due after a restart
+        lastRun = self._scrapeScheduler.lastRun
+        nextBoundary = None
+        try:
+            if (lastRun):
+                nextBoundary = await self._eventService.getNextEventBoundary(lastRun)
+        except Exception as e:
+            # An exception here would stop the task for good, so poll on the backoff interval alone until events load
+            self._logger.error(e)
+            self._logger.error("Unable to load event boundaries for the scrape schedule.")
+        seconds = (self._scrapeScheduler.getNextRun(nextBoundary=nextBoundary) - datetime.utcnow()).total_seconds()
+        if (seconds > 0):
+            self._logger.info(f"Next event update in: {seconds} seconds.")
+            await asyncio.sleep(seconds)
 
         self._logger.info("Updating daily info.")
         try:
             self._logger.info("Checking for expired events.")
             await self._eventService.cleanExpiredEvents()
 
-            self._logger.info("Webscraping crunchyroll princess connect news website.")
-            events = await WebScraper.scrape_crunchyroll_events()
-            if (events):
-                self._logger.info("Checking if scraped data contains new events.")
-                await self._eventService.addEvents(events)
+            self._logger.info("Ingesting events from every event source.")
+            changes = await self._ingestionService.run()
+            if (changes == None):
+                self._logger.error("No event source could be ingested.")
+                self._scrapeScheduler.recordFailure()
+            else:
+                self._scrapeScheduler.recordRun(changed=bool(changes["added"] or changes["changed"] or changes["removed"]))
         except Exception as e:
             self._logger.error(e) 
+            self._scrapeScheduler.recordFailure()
 
     
     @tasks.loop(seconds=30)
@@ -193,41 +229,46 @@ class InfoCog(commands.Cog):
             # Create embed of all event information
             embed = self.createEventEmbed(title="Princess Connect Daily Update", data = eventsEnding + eventsComing)
 
-            # Print to every server if possible
+            # Load every guild's settings with one query instead of one per guild
+            guildCog: GuildCog = self._bot.get_cog('GuildCog')
+            serverSettings = {}
+            if (guildCog):
+                serverSettings = await guildCog.getAllServerSettings(ids=[guild.id for guild in self._bot.guilds])
+
+            # Resolve every server's channel, then send to all of them concurrently
+            jobs = []
             for guild in self._bot.guilds:
-                try:
-                    # Get to server channel if they have set server settings for it
-                    guildCog: GuildCog = self._bot.get_cog('GuildCog')
-                    if (guildCog):
-                        result = await guildCog.getServerSettings(id=guild.id)
-                        if (result and "notificationChannelID" in result.keys() and result["notificationChannelID"]):
-                            # Print to notification channel based on settings
-                            channel = self._bot.get_channel(result["notificationChannelID"])
-                            if (channel):
-                                if ("roleID" not in result.keys() or not result['roleID']):
-                                    await channel.send(embed=embed)
-                                    continue
-                                else:
-                                    roleName = f"<@&{result['roleID']}>"
-                                    async with channel.typing():
-                                        await channel.send(roleName, embed=embed)
-                                    continue
-                    
-                    # Print to these channels if guild does not have guild settings or unable to get channel id
-                    channel = discord.utils.get(guild.text_channels, name='priconne-notifications')
-                    if (channel):
-                        async with channel.typing():
-                            await channel.send(embed=embed)
-                        continue
-
-                    channel = discord.utils.get(guild.text_channels, name='princess-connect-notifications')
-                    if (channel):
-                        async with channel.typing():
-                            await channel.send(embed=embed)
-                        continue
-                except Exception as e:
-                    self._logger.error(e)
-                    self._logger.error(f"Something went wrong with sending a daily update to the server {guild}.")
+                target = self.getNotificationTarget(guild=guild, settings=serverSettings.get(guild.id, None))
+                if (target):
+                    channel, content = target
+                    jobs.append((str(guild), lambda channel=channel, content=content: channel.send(content, embed=embed)))
+
+            await self._broadcaster.broadcast(jobs)
+
+    def getNotificationTarget(self, guild: discord.guild.Guild, settings: dict = None) -> tuple:
+        """
+        Returns the channel and message content for a server's daily update, or None if the server has nowhere to send it.
+        """
+        # Get to server channel if they have set server settings for it
+        if (settings and "notificationChannelID" in settings.keys() and settings["notificationChannelID"]):
+            # Print to notification channel based on settings
+            channel = self._bot.get_channel(settings["notificationChannelID"])
+            if (channel):
+                if ("roleID" not in settings.keys() or not settings['roleID']):
+                    return channel, None
+                else:
+                    return channel, f"<@&{settings['roleID']}>"
+
+        # Print to these channels if guild does not have guild settings or unable to get channel id
+        channel = discord.utils.get(guild.text_channels, name='priconne-notifications')
+        if (channel):
+            return channel, None
+
+        channel = discord.utils.get(guild.text_channels, name='princess-connect-notifications')
+        if (channel):
+            return channel, None
+
+        return None
     
     @princess_connect_daily_update.before_loop
     async def before_daily_update(self):
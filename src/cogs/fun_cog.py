@@ -5,6 +5,7 @@ import random
 
 from src.discord_bot import DiscordBot
 from src.utils.logger import setup_logger
+from src.utils.response import respond
 
 class FunCog(commands.Cog):
     def __init__(self, bot: DiscordBot):
@@ -18,24 +19,20 @@ class FunCog(commands.Cog):
     @commands.hybrid_command(name="coinflip", with_app_command=True, description="Does a coin flip.")
     async def coinflip(self, ctx: commands.context.Context):
         flip = random.randint(1,2)
-        async with ctx.message.channel.typing():
-            await ctx.reply("Heads." if flip == 1 else "Tails.")
+        await respond(ctx, "Heads." if flip == 1 else "Tails.")
 
     @commands.hybrid_command(name="random", with_app_command=True, description="Chooses a number between 1 to X. The bot will choose one.")
     async def random(self, ctx: commands.context.Context, number:int = commands.parameter(default=100, description="The max random number.")):
         if (number <= 1 or number > 999999):
-            async with ctx.message.channel.typing():
-                await ctx.reply("Choose a number higher than 1, but lower or equals to 999999")
+            await respond(ctx, "Choose a number higher than 1, but lower or equals to 999999")
             return
         result = random.randint(1, number)
-        async with ctx.message.channel.typing():
-            await ctx.reply(f"{result} out of {number}.")
+        await respond(ctx, f"{result} out of {number}.")
 
     @commands.hybrid_command(name="should", with_app_command=True, description="Ask a question, bot will give a vague answer.")
     async def should(self, ctx: commands.context.Context, *, description = commands.parameter(default=None, description="The question.")):
         if (not description):
-            async with ctx.message.channel.typing():
-                await ctx.reply("Add a description.")
+            await respond(ctx, "Add a description.")
             return
 
         result = random.randint(1, 10)
@@ -47,8 +44,7 @@ class FunCog(commands.Cog):
         else:
             message = "No."
             
-        async with ctx.message.channel.typing():
-            await ctx.reply(message)
+        await respond(ctx, message)
 
 async def setup(bot: DiscordBot):
     await bot.add_cog(FunCog(bot=bot))
\ No newline at end of file
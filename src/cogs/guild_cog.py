@@ -5,6 +5,7 @@ import textwrap
 from src.discord_bot import DiscordBot
 from src.services.guild_service import GuildService
 from src.utils.logger import setup_logger
+from src.utils.response import respond
 
 class GuildCog(commands.Cog):
     def __init__(self, bot: DiscordBot):
@@ -21,6 +22,7 @@ class GuildCog(commands.Cog):
     
     @commands.Cog.listener()
     async def on_guild_join(self, guild: discord.guild.Guild):
+        owner = None
         try:
             await self._guildServices.addGuild(guild.id)
 
@@ -35,10 +37,15 @@ class GuildCog(commands.Cog):
             - Use `/help` to see a list of commands.
             """))
             
-            await guild.owner.send(embed=embed)
+            # Members are not cached in lean mode, so the owner is fetched when it is not
+            owner = guild.owner or await self._bot.fetch_user(guild.owner_id)
+            await owner.send(embed=embed)
+        except discord.errors.Forbidden as e:
+            self._logger.error(e)
+            self._logger.error(f'{owner} has their dms turned off')
         except Exception as e:
             self._logger.error(e)
-            self._logger.error(f'{guild.owner} has their dms turned off')
+            self._logger.error(f'Unable to welcome the owner of {guild}.')
 
     @commands.hybrid_group(name="setup", with_app_command=True, description="Setup server settings.", pass_context=True)
     async def setup(self, ctx:commands.context.Context):
@@ -50,26 +57,22 @@ class GuildCog(commands.Cog):
         Setup server by assigning notification channel and discord ping role.
         """
         if (not ctx.message.guild):
-            async with ctx.message.channel.typing():
-                await ctx.reply("This command can only be used in a server.")
+            await respond(ctx, "This command can only be used in a server.")
             return
 
         # prevent people from using this command if they are not owner or admin
-        if (not (ctx.author.guild_permissions.administrator or ctx.author == ctx.guild.owner)):
-            async with ctx.message.channel.typing():
-                await ctx.reply("You do not have permission to use this command.")
+        if (not (ctx.author.guild_permissions.administrator or ctx.author.id == ctx.guild.owner_id)):
+            await respond(ctx, "You do not have permission to use this command.")
             return
 
         # check if channels are the proper type
         if (channel and type(channel) != discord.TextChannel):
-            async with ctx.message.channel.typing():
-                await ctx.reply("Please enter a proper notification channel. You can do this with #channel.")
+            await respond(ctx, "Please enter a proper notification channel. You can do this with #channel.")
             return
 
         # check if roles are the proper type
         if (role and type(role) != discord.Role):
-            async with ctx.message.channel.typing():
-                await ctx.reply("Please enter a proper role.")
+            await respond(ctx, "Please enter a proper role.")
             return
     
         # Attempt to update guild information
@@ -95,16 +98,13 @@ class GuildCog(commands.Cog):
                         description=message,
                         color=discord.Colour.blurple())
 
-                async with ctx.message.channel.typing():
-                    await ctx.reply(embed=embed)
+                await respond(ctx, embed=embed)
             else:
-                async with ctx.message.channel.typing():
-                    await ctx.reply("Unable to update server settings.")
+                await respond(ctx, "Unable to update server settings.")
             
         except Exception as e:
             self._logger.error(e)
-            async with ctx.message.channel.typing():
-                await ctx.reply("Guild setup has failed unexpectedly. Make sure the bot has access to those channels and they are spelled correctly.")
+            await respond(ctx, "Guild setup has failed unexpectedly. Make sure the bot has access to those channels and they are spelled correctly.")
 
     @setup.command(name="delete", with_app_command=True, description="Delete server's event notification settings.", pass_context=True)
     async def setupDelete(self, ctx: commands.context.Context):
@@ -112,27 +112,26 @@ class GuildCog(commands.Cog):
         Delete server's settings for notification channel and discord ping role.
         """
         if (not ctx.message.guild):
-            async with ctx.message.channel.typing():
-                await ctx.reply("This command can only be used in a server.")
+            await respond(ctx, "This command can only be used in a server.")
             return
 
         # prevent people from using this command if they are not owner or admin
-        if (not (ctx.author.guild_permissions.administrator or ctx.author == ctx.guild.owner)):
-            async with ctx.message.channel.typing():
-                await ctx.reply("You do not have permission to use this command.")
+        if (not (ctx.author.guild_permissions.administrator or ctx.author.id == ctx.guild.owner_id)):
+            await respond(ctx, "You do not have permission to use this command.")
             return
 
         result = await self._guildServices.deleteGuild(id=ctx.message.guild.id)
 
         if (result):
-            async with ctx.message.channel.typing():
-                await ctx.reply("Guild settings have been deleted. Use the setup command to re-enable event heads-up.")
+            await respond(ctx, "Guild settings have been deleted. Use the setup command to re-enable event heads-up.")
         else:
-            async with ctx.message.channel.typing():
-                await ctx.reply("Unable to delete server settings.")
+            await respond(ctx, "Unable to delete server settings.")
 
     async def getServerSettings(self, id: int):
         return await self._guildServices.getServerSettings(id=id)
 
+    async def getAllServerSettings(self, ids: list[int]) -> dict:
+        return await self._guildServices.getAllServerSettings(ids=ids)
+
 async def setup(bot: DiscordBot):
     await bot.add_cog(GuildCog(bot=bot))
\ No newline at end of file
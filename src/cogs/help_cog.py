@@ -4,6 +4,7 @@ import textwrap
 
 from src.discord_bot import DiscordBot
 from src.utils.logger import setup_logger
+from src.utils.response import respond
 
 class HelpCog(commands.Cog):
     def __init__(self, bot: DiscordBot):
@@ -41,8 +42,7 @@ class HelpCog(commands.Cog):
         button = discord.ui.Button(style=discord.ButtonStyle.blurple, label="Github", url="https://github.com/Nycarus/Neneka-Bot")
         view.add_item(button)
         
-        async with ctx.message.channel.typing():
-            await ctx.reply(embed=embed, view=view)
+        await respond(ctx, embed=embed, view=view)
 
 async def setup(bot: DiscordBot):
     await bot.add_cog(HelpCog(bot=bot))
\ No newline at end of file
@@ -1,22 +1,31 @@
+import os
+import asyncio
 import discord
-from discord.ext import tasks, commands
+from discord.ext import commands
 from datetime import datetime, timedelta
 import textwrap
 
 from src.discord_bot import DiscordBot
 from src.services.reminder_services import ReminderService
 from src.models.reminder_model import ReminderModel
+from src.utils.cache import TTLCache, MISSING
 from src.utils.logger import setup_logger
+from src.utils.response import respond
 
 class ReminderCog(commands.Cog):
     def __init__(self, bot: DiscordBot):
         self._bot = bot
         self._reminderService = ReminderService()
-        self.executeReminders.start()
+        self._schedulerTask: asyncio.Task = None
+        self._memberCache = TTLCache(maxSize=int(os.environ.get("MEMBER_LOOKUP_CACHE_SIZE", 1024)), ttl=float(os.environ.get("MEMBER_LOOKUP_CACHE_TTL", 600)))
         self._logger = setup_logger('bot.cog.reminder', '/data/discord.log')
 
+    async def cog_load(self):
+        self._schedulerTask = asyncio.create_task(self.executeReminders())
+
     def cog_unload(self):
-        self.executeReminders.cancel()
+        if (self._schedulerTask):
+            self._schedulerTask.cancel()
 
     @commands.Cog.listener()
     async def on_ready(self):
@@ -33,16 +42,14 @@ class ReminderCog(commands.Cog):
         """
         
         if (days < 0 or hours < 0 or minutes < 0):
-            async with ctx.message.channel.typing():
-                await ctx.reply("Please enter the proper amount of time to make the reminder.")
+            await respond(ctx, "Please enter the proper amount of time to make the reminder.")
             return
 
         if (days == 0 and hours == 0 and minutes == 0):
             minutes = 1
 
         if (not description):
-            async with ctx.message.channel.typing():
-                await ctx.reply("Please enter the proper description for the reminder.")
+            await respond(ctx, "Please enter the proper description for the reminder.")
             return
 
         try:
@@ -76,11 +83,9 @@ class ReminderCog(commands.Cog):
 
                 embed.set_footer(text="Make sure the bot can DM you just in case.")
 
-                async with ctx.message.channel.typing():
-                    await ctx.reply(embed=embed)
+                await respond(ctx, embed=embed)
             else:
-                async with ctx.message.channel.typing():
-                    await ctx.reply("I was not able to make the reminder.")
+                await respond(ctx, "I was not able to make the reminder.")
         except Exception as e:
             self._logger.error(e)
 
@@ -91,59 +96,75 @@ class ReminderCog(commands.Cog):
         """
         result = await self._reminderService.deleteAllReminders(userID=ctx.author.id)
         if (result):
-            async with ctx.message.channel.typing():
-                await ctx.reply("Successfully deleted all of your reminders.")
+            await respond(ctx, "Successfully deleted all of your reminders.")
         else:
-            async with ctx.message.channel.typing():
-                await ctx.reply("Unable to delete any of your reminders. You may not have any reminders.")
+            await respond(ctx, "Unable to delete any of your reminders. You may not have any reminders.")
 
-    @tasks.loop(minutes=1)
     async def executeReminders(self):
+        """
+        Delivers each reminder as soon as it is due, for as long as the cog is loaded.
+        """
+        await self._bot.wait_until_ready()
+        await self._reminderService.runScheduler(self.deliverReminder)
+
+    async def deliverReminder(self, reminder: ReminderModel):
         try:
-            reminders: list[ReminderModel] = await self._reminderService.getAndDeleteOldReminders()
-        except Exception as ex:
-            self._logger.error(ex)
-            self._logger.error("Something was wrong with getting reminders.")
-        
-        # Send Reminders that are old
-        if (reminders):
-            for reminder in reminders:
-                try:
-                    # Creating message
-                    epoch_time = datetime(1970, 1, 1)
-                    currentDate = reminder.endDate - epoch_time
-                    previousDate = reminder.startDate - epoch_time
-                    embed = discord.embeds.Embed(title=f"Reminder from {f'<t:{int(previousDate.total_seconds())}:f>'}.", 
-                        description=textwrap.dedent(
-                        f"""
-                        Hello, today is {f'<t:{int(currentDate.total_seconds())}:f>'} and I am here to notify you about your reminder.
-                        
-                        **Your message:**
-                        {reminder.description}
-                        """),
-                        color=discord.Colour.blurple())
-
-                    # attempt to print to guild channel, if bot still has access
-                    if (reminder.guildID and reminder.channelID):
-                        guild = self._bot.get_guild(reminder.guildID)
-                        if (guild and guild.get_member(reminder.userID)): # check if user is still in the guild
-                            channel = self._bot.get_channel(reminder.channelID)
-                            if (channel): # check if channel still exist
-                                async with channel.typing():
-                                    await channel.send(f"<@{reminder.userID}>", embed=embed)
-                                return
-                    
-                    # Print to user's DMs as backup if printing to channel fails
-                    user = self._bot.get_user(reminder.userID)
-                    await user.send(embed=embed)
-                except Exception as e:
-                    self._logger.error(e)
-                    self._logger.error("Something went wrong with delivering reminder.")
-        
+            # Creating message
+            epoch_time = datetime(1970, 1, 1)
+            currentDate = reminder.endDate - epoch_time
+            previousDate = reminder.startDate - epoch_time
+            embed = discord.embeds.Embed(title=f"Reminder from {f'<t:{int(previousDate.total_seconds())}:f>'}.", 
+                description=textwrap.dedent(
+                f"""
+                Hello, today is {f'<t:{int(currentDate.total_seconds())}:f>'} and I am here to notify you about your reminder.
+                
+                **Your message:**
+                {reminder.description}
+                """),
+                color=discord.Colour.blurple())
+
+            # attempt to print to guild channel, if bot still has access
+            if (reminder.guildID and reminder.channelID):
+                guild = self._bot.get_guild(reminder.guildID)
+                if (guild and await self.isGuildMember(guild, reminder.userID)): # check if user is still in the guild
+                    channel = self._bot.get_channel(reminder.channelID)
+                    if (channel): # check if channel still exist
+                        await channel.send(f"<@{reminder.userID}>", embed=embed)
+                        return
+            
+            # Print to user's DMs as backup if printing to channel fails. The user may not be cached by this cluster.
+            user = self._bot.get_user(reminder.userID) or await self._bot.fetch_user(reminder.userID)
+            await user.send(embed=embed)
+        except Exception as e:
+            self._logger.error(e)
+            self._logger.error("Something went wrong with delivering reminder.")
 
-    @executeReminders.before_loop
-    async def before_daily_update(self):
-        await self._bot.wait_until_ready()
+    async def isGuildMember(self, guild: discord.guild.Guild, userID: int) -> bool:
+        """
+        Returns whether the user is in the guild. Members missing from the member cache are fetched, and the answer is cached.
+        """
+        if (guild.get_member(userID)):
+            return True
+
+        # The full member cache already knows everyone in the guild
+        if (self._bot.memberCacheMode != "lean"):
+            return False
+
+        isMember = self._memberCache.get((guild.id, userID))
+        if (isMember is MISSING):
+            try:
+                await guild.fetch_member(userID)
+                isMember = True
+            except discord.NotFound:
+                isMember = False
+            except discord.HTTPException as e:
+                # Unknown, fall back to the DM without caching
+                self._logger.error(e)
+                return False
+            self._memberCache.set((guild.id, userID), isMember)
+
+        return isMember
+        
 
 async def setup(bot: DiscordBot):
     await bot.add_cog(ReminderCog(bot=bot))
\ No newline at end of file
@@ -1,26 +1,154 @@
 import os
+import json
+import time
+import asyncio
+import hashlib
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from src.utils.logger import setup_logger
+from src.utils.response import respond, start_response_timer, stop_response_timer, get_latency_stats
+from src.utils.database import create_schema, dispose_engine
+from src.migrations.migration_runner import run_migrations, wait_for_migrations, check_index_usage
+from src.utils.memory import get_memory_report, record_memory_report
+from src.utils.metrics import MetricsServer
+from src.utils.cluster import get_cluster_id, get_cluster_shard_ids, get_shard_count, is_primary_cluster
 
-class DiscordBot(commands.Bot):
+class DiscordBot(commands.AutoShardedBot):
     def __init__(self, command_prefix: str, intents: discord.Intents):
-        commands.Bot.__init__(self, command_prefix=command_prefix, intents=intents, case_insensitive=True, help_command=None)
+        # Lean mode keeps no members in memory and never chunks guilds, membership is looked up when needed instead
+        self.memberCacheMode = os.environ.get("MEMBER_CACHE_MODE", "full")
+        memberOptions = {}
+        if (self.memberCacheMode == "lean"):
+            intents.members = False
+            memberOptions = {"member_cache_flags": discord.MemberCacheFlags.none(), "chunk_guilds_at_startup": False}
+
+        # Runs the shards of this process' cluster, or every shard when not clustered
+        commands.AutoShardedBot.__init__(self, command_prefix=command_prefix, intents=intents, case_insensitive=True, help_command=None,
+            shard_ids=get_cluster_shard_ids(), shard_count=get_shard_count(), **memberOptions)
+        self.clusterID = get_cluster_id()
+        self.isPrimaryCluster = is_primary_cluster()
+        self._metricsServer: MetricsServer = None
         self._logger = setup_logger('bot', '/data/discord.log')
+
+        # Time every command's first response, and defer slow slash commands
+        self.before_invoke(start_response_timer)
+        self.after_invoke(stop_response_timer)
     
     async def setup_hook(self):
-        # Load Cogs
-        for filename in os.listdir("./src/cogs"):
-            if filename.endswith(".py"):
-                await self.load_extension(f'src.cogs.{filename[:-3]}')
-                self._logger.info(f'{filename} cog loaded.')
+        timings = {}
+        start = time.perf_counter()
+
+        # Serve metrics, each cluster on its own port after the configured one
+        phaseStart = time.perf_counter()
+        if (os.environ.get("METRICS_PORT", None)):
+            self._metricsServer = MetricsServer(port=int(os.environ["METRICS_PORT"]) + self.clusterID)
+            await self._metricsServer.start()
+            timings["metrics"] = time.perf_counter() - phaseStart
+
+        # Log command response percentiles periodically
+        self.reportLatency.change_interval(minutes=float(os.environ.get("RESPONSE_LATENCY_REPORT_MINUTES", 60)))
+        self.reportLatency.start()
+
+        # Create database tables and apply migrations before any repository is used, once across all clusters
+        if (self.isPrimaryCluster):
+            phaseStart = time.perf_counter()
+            await create_schema()
+            timings["schema"] = time.perf_counter() - phaseStart
+
+            phaseStart = time.perf_counter()
+            await run_migrations()
+            timings["migrations"] = time.perf_counter() - phaseStart
+
+            if (int(os.environ.get("DATABASE_CHECK_INDEXES", 0)) == 1):
+                phaseStart = time.perf_counter()
+                await check_index_usage()
+                timings["index check"] = time.perf_counter() - phaseStart
+        else:
+            # Cogs query the database as soon as they load, so the other clusters wait for the primary to migrate
+            phaseStart = time.perf_counter()
+            await wait_for_migrations()
+            timings["schema wait"] = time.perf_counter() - phaseStart
+
+        # Load Cogs, they do not depend on each other while loading
+        phaseStart = time.perf_counter()
+        filenames = [filename for filename in os.listdir("./src/cogs") if filename.endswith(".py")]
+        await asyncio.gather(*(self.load_extension(f'src.cogs.{filename[:-3]}') for filename in filenames))
+        self._logger.info(f'{", ".join(filenames)} cogs loaded.')
+        timings["cogs"] = time.perf_counter() - phaseStart
+
+        # Sync slash commands, only when they changed since the last sync. The tree is global, so one cluster syncs it.
+        if (self.isPrimaryCluster):
+            phaseStart = time.perf_counter()
+            await self.syncCommandTree()
+            timings["command sync"] = time.perf_counter() - phaseStart
+
+        self._logger.info(f"Cluster {self.clusterID} setup took {time.perf_counter() - start:.3f} seconds: {', '.join(f'{name} {seconds:.3f}s' for name, seconds in timings.items())}.")
+
+    def getCommandTreeHash(self) -> str:
+        commands = sorted((command.to_dict() for command in self.tree.get_commands()), key=lambda command: (command["type"], command["name"]))
+        return hashlib.sha256(json.dumps(commands, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    async def syncCommandTree(self) -> bool:
+        """
+        Syncs the app command tree if it differs from the last synced one. Returns whether a sync was made.
+        """
+        path = os.environ.get("COMMAND_TREE_HASH_PATH", "/data/command_tree.hash")
+        treeHash = self.getCommandTreeHash()
+
+        try:
+            if (os.path.exists(path)):
+                with open(path, "r") as file:
+                    if (file.read().strip() == treeHash):
+                        self._logger.info("Command tree is unchanged, skipping sync.")
+                        return False
+        except Exception as e:
+            self._logger.error(e)
 
-        # Sync slash commands
         await self.tree.sync()
+        self._logger.info("Command tree synced.")
+
+        try:
+            with open(path, "w") as file:
+                file.write(treeHash)
+        except Exception as e:
+            self._logger.error(e)
+            self._logger.error("Unable to persist the command tree hash.")
+        return True
+
+    @tasks.loop(minutes=60)
+    async def reportLatency(self):
+        stats = get_latency_stats()
+        if (not stats):
+            return
+
+        self._logger.info("Command response times: " + ", ".join(f"{name} p50 {values['p50']:.3f}s p99 {values['p99']:.3f}s ({values['count']})"
+            for name, values in sorted(stats.items())))
+
+    async def close(self):
+        self.reportLatency.cancel()
+        await commands.AutoShardedBot.close(self)
+        if (self._metricsServer):
+            await self._metricsServer.stop()
+        await dispose_engine()
 
     async def on_ready(self):
-        print(f'{self.user} is now running.')
-        self._logger.info(f'{self.user} is now running.')
+        print(f'{self.user} is now running on cluster {self.clusterID}.')
+        self._logger.info(f'{self.user} is now running on cluster {self.clusterID} with {len(self.shards)} shards.')
+
+        report = get_memory_report(guildCount=len(self.guilds), memberCount=sum(len(guild.members) for guild in self.guilds))
+        self._logger.info(f"Memory with {self.memberCacheMode} member cache: {report['rssMB']:.1f} MB RSS, {report['guilds']} guilds, "
+            f"{report['cachedMembers']} cached members, {report['rssMBPer1kGuilds'] or 0:.1f} MB per 1k guilds.")
+
+        # Compare with the last run in the other member cache mode, by memory per 1k guilds
+        try:
+            reports = record_memory_report(self.memberCacheMode, report)
+            full, lean = reports.get("full", None), reports.get("lean", None)
+            if (full and lean and full["rssMBPer1kGuilds"] and lean["rssMBPer1kGuilds"]):
+                self._logger.info(f"Memory per 1k guilds: full {full['rssMBPer1kGuilds']:.1f} MB, lean {lean['rssMBPer1kGuilds']:.1f} MB, "
+                    f"lean saves {full['rssMBPer1kGuilds'] - lean['rssMBPer1kGuilds']:.1f} MB.")
+        except Exception as e:
+            self._logger.error(e)
+            self._logger.error("Unable to record the memory report.")
 
     async def on_command_error(self, ctx: commands.context.Context, exception: commands.CommandError, /) -> None:
-        await ctx.reply(f"Error has occured: {str(exception)}")
\ No newline at end of file
+        await respond(ctx, f"Error has occured: {str(exception)}")
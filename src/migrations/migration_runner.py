@@ -0,0 +1,145 @@
+import os
+import sys
+import json
+import asyncio
+import importlib
+from datetime import datetime
+from sqlalchemy import text
+
+from src.utils.database import get_engine, create_schema, dispose_engine
+from src.utils.logger import setup_logger
+
+# Arbitrary key for pg_advisory_xact_lock so concurrent bot processes migrate one at a time
+MIGRATION_LOCK_KEY = 7281946
+
+# Queries that run on every command or background loop, with the indexes they are expected to use
+HOT_QUERIES = {
+    "Reminder.findAllByDateLessThanEqual": ('SELECT * FROM reminder WHERE "endDate" <= :date', {"date": datetime(2000, 1, 1)}),
+    "Reminder.findAllByUserID": ('SELECT * FROM reminder WHERE "userID" = :id', {"id": 0}),
+    "Event.findAllByDateBetween": ('SELECT * FROM event WHERE "startDate" <= :date AND "endDate" >= :date ORDER BY "endDate"', {"date": datetime(2000, 1, 1)}),
+    "Event.findAllByStartDateBetween": ('SELECT * FROM event WHERE "startDate" >= :startDate AND "startDate" <= :endDate ORDER BY "startDate"', {"startDate": datetime(2000, 1, 1), "endDate": datetime(2000, 1, 2)}),
+    "Event.findAllByEndDateBetween": ('SELECT * FROM event WHERE "endDate" >= :startDate AND "endDate" <= :endDate ORDER BY "endDate"', {"startDate": datetime(2000, 1, 1), "endDate": datetime(2000, 1, 2)}),
+    "Event.deleteAllByEndDateIsNullAndStartDateLessThanEqual": ('SELECT * FROM event WHERE "endDate" IS NULL AND "startDate" <= :date', {"date": datetime(2000, 1, 1)}),
+}
+
+def load_migrations() -> list:
+    """
+    Returns every migration module in src/migrations/versions, ordered by version.
+    """
+    migrations = []
+    for filename in sorted(os.listdir("./src/migrations/versions")):
+        if filename.endswith(".py"):
+            migrations.append(importlib.import_module(f'src.migrations.versions.{filename[:-3]}'))
+
+    return sorted(migrations, key=lambda migration: migration.VERSION)
+
+def _upgrade(connection, migrations: list) -> list:
+    connection.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": MIGRATION_LOCK_KEY})
+    connection.execute(text('CREATE TABLE IF NOT EXISTS schema_version (version INTEGER PRIMARY KEY, description VARCHAR NOT NULL, "appliedAt" TIMESTAMP NOT NULL)'))
+
+    currentVersion = connection.execute(text("SELECT coalesce(max(version), 0) FROM schema_version")).scalar()
+
+    applied = []
+    for migration in migrations:
+        if (migration.VERSION <= currentVersion):
+            continue
+
+        migration.upgrade(connection)
+        connection.execute(text('INSERT INTO schema_version (version, description, "appliedAt") VALUES (:version, :description, :appliedAt)'),
+            {"version": migration.VERSION, "description": migration.DESCRIPTION, "appliedAt": datetime.utcnow()})
+        applied.append(migration)
+
+    return applied
+
+async def run_migrations() -> None:
+    """
+    Applies pending migrations in a single transaction. Should be called once at startup, after create_schema.
+    """
+    logger = setup_logger('bot.database.migrations', '/data/discord.log')
+
+    async with get_engine().begin() as connection:
+        applied = await connection.run_sync(_upgrade, load_migrations())
+
+    if (applied):
+        for migration in applied:
+            logger.info(f"Applied migration {migration.VERSION}: {migration.DESCRIPTION}")
+    else:
+        logger.info("Database schema is up to date.")
+
+async def wait_for_migrations(timeout: float = None, interval: float = None) -> None:
+    """
+    Waits until another process has applied every migration, for processes that must not migrate themselves.
+    Raises TimeoutError if the schema is still behind after timeout seconds.
+    """
+    logger = setup_logger('bot.database.migrations', '/data/discord.log')
+    timeout = timeout if timeout else float(os.environ.get("MIGRATION_WAIT_TIMEOUT", 300))
+    interval = interval if interval else float(os.environ.get("MIGRATION_WAIT_INTERVAL", 2))
+    latestVersion = max((migration.VERSION for migration in load_migrations()), default=0)
+
+    deadline = asyncio.get_running_loop().time() + timeout
+    while True:
+        async with get_engine().connect() as connection:
+            # schema_version is created with the first migration run, after create_schema
+            currentVersion = None
+            if ((await connection.execute(text("SELECT to_regclass('schema_version') IS NOT NULL"))).scalar()):
+                currentVersion = (await connection.execute(text("SELECT coalesce(max(version), 0) FROM schema_version"))).scalar()
+
+        if (currentVersion != None and currentVersion >= latestVersion):
+            return
+
+        if (asyncio.get_running_loop().time() >= deadline):
+            raise TimeoutError(f"Database schema is at version {currentVersion}, expected {latestVersion}.")
+
+        logger.info(f"Waiting for the database schema to reach version {latestVersion}, it is at {currentVersion}.")
+        await asyncio.sleep(interval)
+
+def _find_index_names(plan: dict) -> list[str]:
+    names = []
+    if ("Index Name" in plan.keys()):
+        names.append(plan["Index Name"])
+    for subplan in plan.get("Plans", []):
+        names += _find_index_names(subplan)
+    return names
+
+async def check_index_usage() -> dict:
+    """
+    Runs EXPLAIN on every hot query and returns the indexes each one can use. A query mapped to an empty list would sequentially scan.
+    """
+    logger = setup_logger('bot.database.migrations', '/data/discord.log')
+
+    results = {}
+    async with get_engine().connect() as connection:
+        async with connection.begin():
+            # Small tables favour sequential scans, so ask the planner whether the index is usable at all
+            await connection.execute(text("SET LOCAL enable_seqscan = off"))
+            for name, (query, parameters) in HOT_QUERIES.items():
+                plan = (await connection.execute(text(f"EXPLAIN (FORMAT JSON) {query}"), parameters)).scalar()
+                if (type(plan) == str):
+                    plan = json.loads(plan)
+                results[name] = _find_index_names(plan[0]["Plan"])
+
+                if (results[name]):
+                    logger.info(f"{name} uses index {', '.join(results[name])}.")
+                else:
+                    logger.warning(f"{name} does not use an index.")
+
+    return results
+
+async def _main() -> int:
+    try:
+        await create_schema()
+        await run_migrations()
+        results = await check_index_usage()
+    finally:
+        await dispose_engine()
+
+    missing = [name for name, indexes in results.items() if not indexes]
+    for name, indexes in results.items():
+        print(f"{name}: {', '.join(indexes) if indexes else 'sequential scan'}")
+    return 1 if missing else 0
+
+if __name__ == '__main__':
+    # The bot loads the environment in main.py, a standalone run has to do it itself
+    from dotenv import load_dotenv
+    load_dotenv()
+    sys.exit(asyncio.run(_main()))
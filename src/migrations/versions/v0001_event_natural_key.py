@@ -0,0 +1,9 @@
+from sqlalchemy import text
+
+VERSION = 1
+DESCRIPTION = "Unique natural key on event (name, startDate, endDate)."
+
+def upgrade(connection) -> None:
+    # Remove existing duplicates, otherwise the unique index cannot be built
+    connection.execute(text('DELETE FROM event a USING event b WHERE a.id > b.id AND a.name = b.name AND a."startDate" = b."startDate" AND a."endDate" IS NOT DISTINCT FROM b."endDate"'))
+    connection.execute(text('CREATE UNIQUE INDEX IF NOT EXISTS uq_event_natural_key ON event (name, "startDate", coalesce("endDate", \'infinity\'::timestamp))'))
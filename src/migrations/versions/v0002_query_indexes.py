@@ -0,0 +1,11 @@
+from sqlalchemy import text
+
+VERSION = 2
+DESCRIPTION = "Indexes for reminder and event date range queries."
+
+def upgrade(connection) -> None:
+    connection.execute(text('CREATE INDEX IF NOT EXISTS "ix_reminder_endDate" ON reminder ("endDate")'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS "ix_reminder_userID" ON reminder ("userID")'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS "ix_event_startDate_endDate" ON event ("startDate", "endDate")'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS "ix_event_endDate" ON event ("endDate")'))
+    connection.execute(text('CREATE INDEX IF NOT EXISTS "ix_event_startDate_no_endDate" ON event ("startDate") WHERE "endDate" IS NULL'))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy import Column, Integer, String, DateTime, Index, func, literal_column
 from src.models.model import Base
 
 class EventModel(Base):
@@ -7,4 +7,13 @@ class EventModel(Base):
     id = Column(Integer, primary_key=True)
     name = Column(String, nullable=False)
     startDate = Column(DateTime, nullable=False)
-    endDate = Column(DateTime, nullable=True)
\ No newline at end of file
+    endDate = Column(DateTime, nullable=True)
+
+# Natural key of an event. endDate is coalesced since NULLs never conflict in a unique index.
+EVENT_NATURAL_KEY = (EventModel.name, EventModel.startDate, func.coalesce(EventModel.endDate, literal_column("'infinity'::timestamp")))
+Index("uq_event_natural_key", *EVENT_NATURAL_KEY, unique=True)
+
+# Indexes for the date range queries, kept in sync with src/migrations/versions
+Index("ix_event_startDate_endDate", EventModel.startDate, EventModel.endDate)
+Index("ix_event_endDate", EventModel.endDate)
+Index("ix_event_startDate_no_endDate", EventModel.startDate, postgresql_where=EventModel.endDate.is_(None))
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, BIGINT, String, DateTime
+from sqlalchemy import Column, BIGINT, String, DateTime, Index
 from src.models.model import Base
 
 class ReminderModel(Base):
@@ -10,4 +10,8 @@ class ReminderModel(Base):
     startDate = Column(DateTime)
     userID = Column(BIGINT)
     channelID = Column(BIGINT, nullable=True)
-    guildID = Column(BIGINT, nullable=True)
\ No newline at end of file
+    guildID = Column(BIGINT, nullable=True)
+
+# Indexes for the due date and user queries, kept in sync with src/migrations/versions
+Index("ix_reminder_endDate", ReminderModel.endDate)
+Index("ix_reminder_userID", ReminderModel.userID)
@@ -1,32 +1,16 @@
-import os
 from datetime import datetime
-from dotenv import load_dotenv
-import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import select, update, insert, delete, and_, or_
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
 
-from src.models.model import Base
-from src.models.event_model import EventModel
+from src.models.event_model import EventModel, EVENT_NATURAL_KEY
+from src.utils.database import get_session
 from src.utils.logger import setup_logger
-from src.utils.secrets import access_secret_version
+from src.utils.metrics import timed_repository
 
+@timed_repository
 class EventRespository:
     def __init__(self):
-        load_dotenv()
-        if (int(os.environ.get("PRODUCTION", 0)) == 1):
-            postgres_user = access_secret_version('POSTGRES_USER')
-            postgres_password = access_secret_version('POSTGRES_PASSWORD')
-            postgres_host = access_secret_version('POSTGRES_HOST')
-            postgres_port = access_secret_version('POSTGRES_PORT')
-            postgres_name = access_secret_version('POSTGRES_NAME')
-            self._engine = create_engine( f"postgresql://{postgres_user}:{postgres_password}@{postgres_host}:{postgres_port}/{postgres_name}")
-        else:
-            self._engine = create_engine(
-                f"postgresql+psycopg2://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_NAME')}"
-                )
-        self._session = sessionmaker()
-        self._session.configure(bind=self._engine, expire_on_commit=False)
-        Base.metadata.create_all(self._engine)
+        self._session = get_session()
         self._logger = setup_logger('bot.repository.event', '/data/discord.log')
     
     async def save(self, event: EventModel) -> bool:
@@ -34,17 +18,16 @@ class EventRespository:
             self._logger.error(f"Incorrect datatype: event with type {type(event)}")
             return False
         
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
                 session.add(event)
+                await session.commit()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database insert error has occured with Event.save.")
                 return False
             else:
-                session.commit()
                 return True
         
     async def saveAll(self, events: list[EventModel]) -> bool:
@@ -52,36 +35,61 @@ class EventRespository:
             self._logger.error(f"Incorrect datatype: events with type {type(events)}")
             return False
         
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                for event in events:
-                    session.add(event)
+                # Single executemany insert instead of one flushed statement per object
+                await session.execute(insert(EventModel), [{"name": event.name, "startDate": event.startDate, "endDate": event.endDate} for event in events])
+                await session.commit()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database insert error has occured with Event.saveAll.")
                 return False
             else:
-                session.commit()
                 return True
 
+    async def saveAllIfNotExists(self, events: list[EventModel]) -> list[EventModel]:
+        """
+        Inserts events in one statement, skipping any that already exist by natural key. Returns only the inserted events.
+        """
+        if (type(events) != list):
+            self._logger.error(f"Incorrect datatype: events with type {type(events)}")
+            return None
+
+        if (not events):
+            return []
+
+        async with self._session() as session:
+            try:
+                query = postgresql_insert(EventModel).values([{"name": event.name, "startDate": event.startDate, "endDate": event.endDate} for event in events])
+                query = query.on_conflict_do_nothing(index_elements=list(EVENT_NATURAL_KEY))
+                query = query.returning(EventModel.id, EventModel.name, EventModel.startDate, EventModel.endDate)
+
+                results = [EventModel(**row._mapping) for row in await session.execute(query)]
+                await session.commit()
+            except Exception as e:
+                self._logger.error(e)
+                await session.rollback()
+                self._logger.error("Database insert error has occured with Event.saveAllIfNotExists.")
+                return None
+            else:
+                return results
+
     async def delete(self, event: EventModel) -> bool:
         if (type(event) != EventModel or not event):
             self._logger.error(f"Incorrect datatype: event with type {type(event)}")
             return False
         
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                session.delete(event)
+                await session.delete(event)
+                await session.commit()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database delete error has occured with Event.delete.")
                 return False
             else:
-                session.commit()
                 return True
 
     async def deleteAll(self, events: list[EventModel]) -> bool:
@@ -89,36 +97,88 @@ class EventRespository:
             self._logger.error(f"Incorrect datatype: events with type {type(events)}")
             return False
         
-        with self._session() as session:
-            session.begin()
+        return await self.deleteAllByIDs([event.id for event in events]) != None
+
+    async def deleteAllByIDs(self, ids: list[int]) -> int:
+        if (type(ids) != list):
+            self._logger.error(f"Incorrect datatype: ids with type {type(ids)}")
+            return None
+
+        if (not ids):
+            return 0
+
+        async with self._session() as session:
             try:
-                for event in events:
-                    session.delete(event)
+                result = await session.execute(delete(EventModel).filter(EventModel.id.in_(ids)).execution_options(synchronize_session=False))
+                await session.commit()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
-                self._logger.error("Database delete error has occured with Event.deleteAll.")
-                return False
+                await session.rollback()
+                self._logger.error("Database delete error has occured with Event.deleteAllByIDs.")
+                return None
             else:
-                session.commit()
-                return True
+                return result.rowcount
+
+    async def deleteAllByEndDateLessThanEqual(self, date: datetime) -> int:
+        if (type(date) != datetime):
+            self._logger.error(f"Incorrect datatype: date with type {type(date)}")
+            return None
+
+        async with self._session() as session:
+            try:
+                result = await session.execute(delete(EventModel).filter(EventModel.endDate <= date).execution_options(synchronize_session=False))
+                await session.commit()
+            except Exception as e:
+                self._logger.error(e)
+                await session.rollback()
+                self._logger.error("Database delete error has occured with Event.deleteAllByEndDateLessThanEqual.")
+                return None
+            else:
+                return result.rowcount
+
+    async def deleteAllByEndDateIsNullAndStartDateLessThanEqual(self, date: datetime) -> int:
+        if (type(date) != datetime):
+            self._logger.error(f"Incorrect datatype: date with type {type(date)}")
+            return None
+
+        async with self._session() as session:
+            try:
+                result = await session.execute(delete(EventModel).filter(EventModel.endDate.is_(None), EventModel.startDate <= date).execution_options(synchronize_session=False))
+                await session.commit()
+            except Exception as e:
+                self._logger.error(e)
+                await session.rollback()
+                self._logger.error("Database delete error has occured with Event.deleteAllByEndDateIsNullAndStartDateLessThanEqual.")
+                return None
+            else:
+                return result.rowcount
+
+    async def findAll(self) -> list[EventModel]:
+        async with self._session() as session:
+            try:
+                results = (await session.execute(select(EventModel))).scalars().all()
+            except Exception as e:
+                self._logger.error(e)
+                await session.rollback()
+                self._logger.error("Database query error has occured with Event.findAll.")
+                return None
+            else:
+                return results
 
     async def findAllByID(self, id:int) -> list[EventModel]:
         if (type(id) != int):
             self._logger.error(f"Incorrect datatype: id with type {type(id)}")
             return None
 
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                results = session.query(EventModel).filter(EventModel.id == id).first()
+                results = (await session.execute(select(EventModel).filter(EventModel.id == id))).scalars().first()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database query error has occured with Event.findAllByID.")
                 return None
             else:
-                session.commit()
                 return results
 
     async def update(self, event: EventModel) -> bool:
@@ -126,44 +186,92 @@ class EventRespository:
             self._logger.error(f"Incorrect datatype: event with type {type(event)}")
             return False
         
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                update = {}
+                values = {}
                 if (event.name):
-                    update["name"] = event.name
+                    values["name"] = event.name
                 if (event.startDate):
-                    update["startDate"] = event.startDate
+                    values["startDate"] = event.startDate
                 if (event.endDate):
-                    update["endDate"] = event.endDate
+                    values["endDate"] = event.endDate
 
-                session.query(EventModel).filter(EventModel.id==event.id).update(update)
-                
+                await session.execute(update(EventModel).filter(EventModel.id==event.id).values(values))
+                await session.commit()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database update error has occured with Event.update.")
                 return False
             else:
-                session.commit()
                 return True
 
+    async def deleteAllByNameAndDate(self, events: list[EventModel]) -> int:
+        """
+        Deletes every event matching the name, startDate and endDate of one of the given events, in one statement.
+        """
+        if (type(events) != list):
+            self._logger.error(f"Incorrect datatype: events with type {type(events)}")
+            return None
+
+        if (not events):
+            return 0
+
+        async with self._session() as session:
+            try:
+                conditions = [and_(EventModel.name == event.name, EventModel.startDate == event.startDate, EventModel.endDate == event.endDate if event.endDate else EventModel.endDate.is_(None)) for event in events]
+                result = await session.execute(delete(EventModel).filter(or_(*conditions)).execution_options(synchronize_session=False))
+                await session.commit()
+            except Exception as e:
+                self._logger.error(e)
+                await session.rollback()
+                self._logger.error("Database delete error has occured with Event.deleteAllByNameAndDate.")
+                return None
+            else:
+                return result.rowcount
+
+    async def updateAllByIDs(self, ids: list[int], name: str=None, startDate: datetime=None, endDate: datetime=None) -> int:
+        if (type(ids) != list):
+            self._logger.error(f"Incorrect datatype: ids with type {type(ids)}")
+            return None
+
+        values = {}
+        if (name):
+            values["name"] = name
+        if (startDate):
+            values["startDate"] = startDate
+        if (endDate):
+            values["endDate"] = endDate
+
+        if (not ids or not values):
+            return 0
+
+        async with self._session() as session:
+            try:
+                result = await session.execute(update(EventModel).filter(EventModel.id.in_(ids)).values(values).execution_options(synchronize_session=False))
+                await session.commit()
+            except Exception as e:
+                self._logger.error(e)
+                await session.rollback()
+                self._logger.error("Database update error has occured with Event.updateAllByIDs.")
+                return None
+            else:
+                return result.rowcount
+
     async def findByName(self, name:str) -> list[EventModel]:
         if (type(name) != str):
             self._logger.error(f"Incorrect datatype: name with type {type(name)}")
             return None
 
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                results = session.query(EventModel).filter(EventModel.name == name).first()
+                results = (await session.execute(select(EventModel).filter(EventModel.name == name))).scalars().first()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database query error has occured with Event.findByName.")
                 return None
             else:
-                session.commit()
                 return results
 
     async def findByNameAndDate(self, name:str, startDate: datetime, endDate: datetime) -> list[EventModel]:
@@ -180,20 +288,21 @@ class EventRespository:
                 self._logger.error(f"Incorrect datatype: endDate with type {type(endDate)}")
                 return None
 
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
+                query = select(EventModel).filter(EventModel.name == name, EventModel.startDate==startDate)
                 if (endDate):
-                    results = session.query(EventModel).filter(EventModel.name == name, EventModel.startDate==startDate, EventModel.endDate==endDate).first()
+                    query = query.filter(EventModel.endDate==endDate)
                 else:
-                    results = session.query(EventModel).filter(EventModel.name == name, EventModel.startDate==startDate, EventModel.endDate==sqlalchemy.sql.null()).first()
+                    query = query.filter(EventModel.endDate.is_(None))
+
+                results = (await session.execute(query)).scalars().first()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database query error has occured with Event.findByNameAndDate.")
                 return None
             else:
-                session.commit()
                 return results
     
     async def findAllByEndDate(self, date: datetime, order:str=None) -> list[EventModel]:
@@ -207,10 +316,9 @@ class EventRespository:
                 self._logger.error(f"Incorrect datatype: order with type {type(order)}")
                 return None
 
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                query = session.query(EventModel)
+                query = select(EventModel)
                 
                 if(order == "desc"):
                     query = query.order_by(EventModel.endDate.desc())
@@ -220,17 +328,16 @@ class EventRespository:
                 if (date):
                     query = query.filter(EventModel.endDate==date)
                 else:
-                    query = query.filter(EventModel.endDate==sqlalchemy.sql.null())
+                    query = query.filter(EventModel.endDate.is_(None))
 
-                results = query.all()
+                results = (await session.execute(query)).scalars().all()
 
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database query error has occured with Event.findAllByEndDate.")
                 return None
             else:
-                session.commit()
                 return results
 
     async def findAllByDateBetween(self, date:datetime, order:str=None) -> list[EventModel]:
@@ -242,25 +349,23 @@ class EventRespository:
                 self._logger.error(f"Incorrect datatype: order with type {type(order)}")
                 return None
 
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                query = session.query(EventModel).group_by(EventModel.endDate, EventModel.id)
+                query = select(EventModel).group_by(EventModel.endDate, EventModel.id)
 
                 if(order == "desc"):
                     query = query.order_by(EventModel.endDate.desc())
                 elif (order == "asc"):
                     query = query.order_by(EventModel.endDate.asc())
                 
-                results = query.filter(EventModel.startDate <= date, EventModel.endDate >= date).all()
+                results = (await session.execute(query.filter(EventModel.startDate <= date, EventModel.endDate >= date))).scalars().all()
 
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database query error has occured with Event.findAllByDateBetween.")
                 return None
             else:
-                session.commit()
                 return results
 
     async def findAllByStartDateBetween(self, startDate:datetime, endDate:datetime, order:str=None) -> list[EventModel]:
@@ -275,25 +380,23 @@ class EventRespository:
                 self._logger.error(f"Incorrect datatype: order with type {type(order)}")
                 return None
 
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                query = session.query(EventModel).group_by(EventModel.startDate, EventModel.endDate, EventModel.id)
+                query = select(EventModel).group_by(EventModel.startDate, EventModel.endDate, EventModel.id)
 
                 if(order == "desc"):
                     query = query.order_by(EventModel.startDate.desc())
                 elif (order == "asc"):
                     query = query.order_by(EventModel.startDate.asc())
                 
-                results = query.filter(EventModel.startDate >= startDate, EventModel.startDate <= endDate).all()
+                results = (await session.execute(query.filter(EventModel.startDate >= startDate, EventModel.startDate <= endDate))).scalars().all()
 
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database query error has occured with Event.findAllByStartDateBetween.")
                 return None
             else:
-                session.commit()
                 return results
 
     async def findAllByEndDateBetween(self, startDate:datetime, endDate:datetime, order:str=None) -> list[EventModel]:
@@ -308,25 +411,23 @@ class EventRespository:
                 self._logger.error(f"Incorrect datatype: order with type {type(order)}")
                 return None
 
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                query = session.query(EventModel).group_by(EventModel.endDate, EventModel.startDate, EventModel.id)
+                query = select(EventModel).group_by(EventModel.endDate, EventModel.startDate, EventModel.id)
 
                 if(order == "desc"):
                     query = query.order_by(EventModel.endDate.desc())
                 elif (order == "asc"):
                     query = query.order_by(EventModel.endDate.asc())
                 
-                results = query.filter(EventModel.endDate >= startDate, EventModel.endDate <= endDate).all()
+                results = (await session.execute(query.filter(EventModel.endDate >= startDate, EventModel.endDate <= endDate))).scalars().all()
 
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database query error has occured with Event.findAllByEndDateBetween.")
                 return None
             else:
-                session.commit()
                 return results
 
     async def findAllByEndDateLessThanEqual(self, date:datetime, order:str=None) -> list[EventModel]:
@@ -338,23 +439,21 @@ class EventRespository:
                 self._logger.error(f"Incorrect datatype: order with type {type(order)}")
                 return None
 
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                query = session.query(EventModel).group_by(EventModel.endDate, EventModel.startDate, EventModel.id)
+                query = select(EventModel).group_by(EventModel.endDate, EventModel.startDate, EventModel.id)
 
                 if(order == "desc"):
                     query = query.order_by(EventModel.endDate.desc())
                 elif (order == "asc"):
                     query = query.order_by(EventModel.endDate.asc())
                 
-                results = query.filter(EventModel.endDate <= date).all()
+                results = (await session.execute(query.filter(EventModel.endDate <= date))).scalars().all()
 
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database query error has occured with Event.findAllByEndDateLessThanEqual.")
                 return None
             else:
-                session.commit()
-                return results
\ No newline at end of file
+                return results
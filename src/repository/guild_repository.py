@@ -1,30 +1,16 @@
-import os
-from dotenv import load_dotenv
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import select, update, delete, any_, bindparam, BIGINT
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
 
-from src.models.model import Base
 from src.models.guild_model import GuildModel
+from src.utils.database import get_session
 from src.utils.logger import setup_logger
-from src.utils.secrets import access_secret_version
+from src.utils.metrics import timed_repository
 
+@timed_repository
 class GuildRespository:
     def __init__(self):
-        load_dotenv()
-        if (int(os.environ.get("PRODUCTION", 0)) == 1):
-            postgres_user = access_secret_version('POSTGRES_USER')
-            postgres_password = access_secret_version('POSTGRES_PASSWORD')
-            postgres_host = access_secret_version('POSTGRES_HOST')
-            postgres_port = access_secret_version('POSTGRES_PORT')
-            postgres_name = access_secret_version('POSTGRES_NAME')
-            self._engine = create_engine( f"postgresql://{postgres_user}:{postgres_password}@{postgres_host}:{postgres_port}/{postgres_name}")
-        else:
-            self._engine = create_engine(
-                f"postgresql+psycopg2://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_NAME')}"
-                )
-        self._session = sessionmaker()
-        self._session.configure(bind=self._engine, expire_on_commit=False)
-        Base.metadata.create_all(self._engine)
+        self._session = get_session()
         self._logger = setup_logger('bot.repository.guild', '/data/discord.log')
     
     async def save(self, guild: GuildModel) -> bool:
@@ -32,42 +18,81 @@ class GuildRespository:
             self._logger.error(f"Incorrect datatype: guild with type {type(guild)}")
             return False
 
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
                 session.add(guild)
+                await session.commit()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database insert error has occured with Guild.save.")
                 return False
             else:
-                session.commit()
                 return True
 
-    async def update(self, guild: GuildModel) -> bool:
+    async def saveIfNotExists(self, guild: GuildModel) -> bool:
+        """
+        Inserts the guild unless one with the same id exists. Returns True only if a row was inserted.
+        """
         if (type(guild) != GuildModel):
             self._logger.error(f"Incorrect datatype: guild with type {type(guild)}")
             return False
 
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                update = {}
-                if (guild.notificationChannelID):
-                    update["notificationChannelID"] = guild.notificationChannelID
-                if (guild.roleID):
-                    update["roleID"] = guild.roleID
-
-                session.query(GuildModel).filter(GuildModel.id == guild.id).update(update)
-                
+                query = postgresql_insert(GuildModel).values(id=guild.id, notificationChannelID=guild.notificationChannelID, roleID=guild.roleID)
+                query = query.on_conflict_do_nothing(index_elements=[GuildModel.id]).returning(GuildModel.id)
+
+                result = (await session.execute(query)).first()
+                await session.commit()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
-                self._logger.error("Database update error has occured with Guild.update.")
+                await session.rollback()
+                self._logger.error("Database insert error has occured with Guild.saveIfNotExists.")
+                return False
+            else:
+                return result != None
+
+    async def saveOrUpdate(self, id: int, notificationChannelID: int=None, roleID: int=None) -> bool:
+        """
+        Inserts the guild, or updates the given settings of an existing guild, in one statement.
+        """
+        if (type(id) != int):
+            self._logger.error(f"Incorrect datatype: id with type {type(id)}")
+            return False
+
+        if (type(notificationChannelID) != int):
+            if (notificationChannelID != None):
+                self._logger.error(f"Incorrect datatype: notificationChannelID with type {type(notificationChannelID)}")
+                return False
+
+        if (type(roleID) != int):
+            if (roleID != None):
+                self._logger.error(f"Incorrect datatype: roleID with type {type(roleID)}")
+                return False
+
+        async with self._session() as session:
+            try:
+                values = {}
+                if (notificationChannelID):
+                    values["notificationChannelID"] = notificationChannelID
+                if (roleID):
+                    values["roleID"] = roleID
+
+                query = postgresql_insert(GuildModel).values(id=id, notificationChannelID=notificationChannelID, roleID=roleID)
+                if (values):
+                    query = query.on_conflict_do_update(index_elements=[GuildModel.id], set_=values)
+                else:
+                    query = query.on_conflict_do_nothing(index_elements=[GuildModel.id])
+
+                await session.execute(query)
+                await session.commit()
+            except Exception as e:
+                self._logger.error(e)
+                await session.rollback()
+                self._logger.error("Database upsert error has occured with Guild.saveOrUpdate.")
                 return False
             else:
-                session.commit()
                 return True
 
     async def update(self, id: int, notificationChannelID : int=None, roleID:int = None) -> bool:
@@ -85,23 +110,22 @@ class GuildRespository:
                 self._logger.error(f"Incorrect datatype: roleID with type {type(roleID)}")
                 return False
 
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                update = {}
+                values = {}
                 if (notificationChannelID):
-                    update["notificationChannelID"] = notificationChannelID
+                    values["notificationChannelID"] = notificationChannelID
                 if (roleID):
-                    update["roleID"] = roleID
+                    values["roleID"] = roleID
 
-                session.query(GuildModel).filter(GuildModel.id == id).update(update)
+                await session.execute(update(GuildModel).filter(GuildModel.id == id).values(values))
+                await session.commit()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database update error has occured with Guild.update.")
                 return False
             else:
-                session.commit()
                 return True
 
     async def delete(self, guild: GuildModel) -> bool:
@@ -109,33 +133,73 @@ class GuildRespository:
             self._logger.error(f"Incorrect datatype: guild with type {type(guild)}")
             return False
 
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                session.delete(guild)
+                await session.delete(guild)
+                await session.commit()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database delete error has occured with Guild.delete.")
                 return False
             else:
-                session.commit()
                 return True
 
+    async def deleteByID(self, id: int) -> bool:
+        """
+        Deletes the guild by id. Returns True only if a row was deleted.
+        """
+        if (type(id) != int):
+            self._logger.error(f"Incorrect datatype: id with type {type(id)}")
+            return False
+
+        async with self._session() as session:
+            try:
+                result = await session.execute(delete(GuildModel).filter(GuildModel.id == id).execution_options(synchronize_session=False))
+                await session.commit()
+            except Exception as e:
+                self._logger.error(e)
+                await session.rollback()
+                self._logger.error("Database delete error has occured with Guild.deleteByID.")
+                return False
+            else:
+                return result.rowcount > 0
+
     async def findByID(self, id: int) -> GuildModel:
         if (type(id) != int):
             self._logger.error(f"Incorrect datatype: id with type {type(id)}")
             return None
 
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                result = session.query(GuildModel).filter(GuildModel.id == id).first()
+                result = (await session.execute(select(GuildModel).filter(GuildModel.id == id))).scalars().first()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database query error has occured with Guild.findByID.")
                 return None
             else:
-                session.commit()
-                return result
\ No newline at end of file
+                return result
+
+    async def findAllByIDs(self, ids: list[int]) -> list[GuildModel]:
+        """
+        Returns every guild in ids with one query. The ids are sent as a single array parameter, so the list may be arbitrarily long.
+        """
+        if (type(ids) != list):
+            self._logger.error(f"Incorrect datatype: ids with type {type(ids)}")
+            return None
+
+        if (not ids):
+            return []
+
+        async with self._session() as session:
+            try:
+                query = select(GuildModel).filter(GuildModel.id == any_(bindparam("ids", value=ids, type_=ARRAY(BIGINT))))
+                results = (await session.execute(query)).scalars().all()
+            except Exception as e:
+                self._logger.error(e)
+                await session.rollback()
+                self._logger.error("Database query error has occured with Guild.findAllByIDs.")
+                return None
+            else:
+                return results
@@ -1,87 +1,172 @@
-import os
-from dotenv import load_dotenv
 from datetime import datetime
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from google.cloud import secretmanager
+from sqlalchemy import select, update, insert, delete, or_, and_
 
-from src.models.model import Base
 from src.models.reminder_model import ReminderModel
+from src.utils.database import get_session
 from src.utils.logger import setup_logger
-from src.utils.secrets import access_secret_version
+from src.utils.metrics import timed_repository
 
+@timed_repository
 class ReminderRespository:
     def __init__(self):
-        load_dotenv()
-        if (int(os.environ.get("PRODUCTION", 0)) == 1):
-            postgres_user = access_secret_version('POSTGRES_USER')
-            postgres_password = access_secret_version('POSTGRES_PASSWORD')
-            postgres_host = access_secret_version('POSTGRES_HOST')
-            postgres_port = access_secret_version('POSTGRES_PORT')
-            postgres_name = access_secret_version('POSTGRES_NAME')
-            self._engine = create_engine( f"postgresql://{postgres_user}:{postgres_password}@{postgres_host}:{postgres_port}/{postgres_name}")
-        else:
-            self._engine = create_engine(
-                f"postgresql+psycopg2://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_NAME')}"
-                )
-        self._session = sessionmaker()
-        self._session.configure(bind=self._engine, expire_on_commit=False)
-        Base.metadata.create_all(self._engine)
+        self._session = get_session()
         self._logger = setup_logger('bot.repository.reminder', '/data/discord.log')
 
+    def _filterByShard(self, query, shardCount: int = None, shardIDs: list = None, includeDirect: bool = True):
+        """
+        Limits query to reminders of guilds on shardIDs, and to reminders made in DMs if includeDirect. No shards means every reminder.
+        """
+        if (not shardCount or shardIDs == None):
+            return query
+
+        # Discord's shard formula, (guild_id >> 22) % shard_count
+        conditions = [and_(ReminderModel.guildID != None, (ReminderModel.guildID.op(">>")(22) % shardCount).in_(shardIDs))]
+        if (includeDirect):
+            conditions.append(ReminderModel.guildID == None)
+        return query.filter(or_(*conditions))
+
     async def save(self, reminder: ReminderModel) -> bool:
         if (type(reminder) != ReminderModel or not reminder):
             self._logger.error(f"Incorrect datatype: reminder with type {type(reminder)}")
             return False
         
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
                 session.add(reminder)
+                await session.commit()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database insert error has occured with Reminder.save.")
                 return False
             else:
-                session.commit()
                 return True
 
-    async def deleteAll(self, reminders: list[ReminderModel]) -> bool:
+    async def saveAll(self, reminders: list[ReminderModel]) -> bool:
         if (type(reminders) != list or not reminders):
             self._logger.error(f"Incorrect datatype: reminders with type {type(reminders)}")
             return False
-        
-        with self._session() as session:
-            session.begin()
+
+        async with self._session() as session:
             try:
-                for reminder in reminders:
-                    session.delete(reminder)
+                # Single executemany insert instead of one flushed statement per object
+                await session.execute(insert(ReminderModel), [{
+                    "description": reminder.description,
+                    "startDate": reminder.startDate,
+                    "endDate": reminder.endDate,
+                    "userID": reminder.userID,
+                    "channelID": reminder.channelID,
+                    "guildID": reminder.guildID} for reminder in reminders])
+                await session.commit()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
-                self._logger.error("Database delete error has occured with Reminder.deleteAll.")
+                await session.rollback()
+                self._logger.error("Database insert error has occured with Reminder.saveAll.")
                 return False
             else:
-                session.commit()
                 return True
 
+    async def deleteAll(self, reminders: list[ReminderModel]) -> bool:
+        if (type(reminders) != list or not reminders):
+            self._logger.error(f"Incorrect datatype: reminders with type {type(reminders)}")
+            return False
+        
+        return await self.deleteAllByIDs([reminder.id for reminder in reminders]) != None
+
+    async def deleteAllByIDs(self, ids: list[int]) -> int:
+        if (type(ids) != list):
+            self._logger.error(f"Incorrect datatype: ids with type {type(ids)}")
+            return None
+
+        if (not ids):
+            return 0
+
+        async with self._session() as session:
+            try:
+                result = await session.execute(delete(ReminderModel).filter(ReminderModel.id.in_(ids)).execution_options(synchronize_session=False))
+                await session.commit()
+            except Exception as e:
+                self._logger.error(e)
+                await session.rollback()
+                self._logger.error("Database delete error has occured with Reminder.deleteAllByIDs.")
+                return None
+            else:
+                return result.rowcount
+
+    async def deleteAllByUserID(self, id: int) -> int:
+        if (type(id) != int or not id):
+            self._logger.error(f"Incorrect datatype: id with type {type(id)}")
+            return None
+
+        async with self._session() as session:
+            try:
+                result = await session.execute(delete(ReminderModel).filter(ReminderModel.userID == id).execution_options(synchronize_session=False))
+                await session.commit()
+            except Exception as e:
+                self._logger.error(e)
+                await session.rollback()
+                self._logger.error("Database delete error has occured with Reminder.deleteAllByUserID.")
+                return None
+            else:
+                return result.rowcount
+
+    async def deleteAllByDateLessThanEqual(self, date: datetime) -> int:
+        if (type(date) != datetime or not date):
+            self._logger.error(f"Incorrect datatype: date with type {type(date)}")
+            return None
+
+        async with self._session() as session:
+            try:
+                result = await session.execute(delete(ReminderModel).filter(ReminderModel.endDate <= date).execution_options(synchronize_session=False))
+                await session.commit()
+            except Exception as e:
+                self._logger.error(e)
+                await session.rollback()
+                self._logger.error("Database delete error has occured with Reminder.deleteAllByDateLessThanEqual.")
+                return None
+            else:
+                return result.rowcount
+
+    async def updateAllByIDs(self, ids: list[int], description: str=None, endDate: datetime=None) -> int:
+        if (type(ids) != list):
+            self._logger.error(f"Incorrect datatype: ids with type {type(ids)}")
+            return None
+
+        values = {}
+        if (description):
+            values["description"] = description
+        if (endDate):
+            values["endDate"] = endDate
+
+        if (not ids or not values):
+            return 0
+
+        async with self._session() as session:
+            try:
+                result = await session.execute(update(ReminderModel).filter(ReminderModel.id.in_(ids)).values(values).execution_options(synchronize_session=False))
+                await session.commit()
+            except Exception as e:
+                self._logger.error(e)
+                await session.rollback()
+                self._logger.error("Database update error has occured with Reminder.updateAllByIDs.")
+                return None
+            else:
+                return result.rowcount
+
     async def findAllByUserID(self, id:int) -> list[ReminderModel]:
         if (type(id) != int or not id):
             self._logger.error(f"Incorrect datatype: id with type {type(id)}")
             return None
 
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                results = session.query(ReminderModel).filter(ReminderModel.userID == id).all()
+                results = (await session.execute(select(ReminderModel).filter(ReminderModel.userID == id))).scalars().all()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database query error has occured with Reminder.findAllByUserID.")
                 return None
             else:
-                session.commit()
                 return results
 
     async def findAllByDateLessThanEqual(self, date:datetime) -> list[ReminderModel]:
@@ -89,15 +174,59 @@ class ReminderRespository:
             self._logger.error(f"Incorrect datatype: date with type {type(date)}")
             return None
 
-        with self._session() as session:
-            session.begin()
+        async with self._session() as session:
             try:
-                results = session.query(ReminderModel).filter(ReminderModel.endDate <= date).all()
+                results = (await session.execute(select(ReminderModel).filter(ReminderModel.endDate <= date))).scalars().all()
             except Exception as e:
                 self._logger.error(e)
-                session.rollback()
+                await session.rollback()
                 self._logger.error("Database query error has occured with Reminder.findAllByDateLessThanEqual.")
                 return None
             else:
-                session.commit()
-                return results
\ No newline at end of file
+                return results
+
+    async def findAllEndDateByDateLessThanEqual(self, date:datetime, shardCount: int = None, shardIDs: list = None, includeDirect: bool = True) -> list[datetime]:
+        if (type(date) != datetime or not date):
+            self._logger.error(f"Incorrect datatype: date with type {type(date)}")
+            return None
+
+        async with self._session() as session:
+            try:
+                query = self._filterByShard(select(ReminderModel.endDate).filter(ReminderModel.endDate <= date), shardCount, shardIDs, includeDirect)
+                results = (await session.execute(query)).scalars().all()
+            except Exception as e:
+                self._logger.error(e)
+                await session.rollback()
+                self._logger.error("Database query error has occured with Reminder.findAllEndDateByDateLessThanEqual.")
+                return None
+            else:
+                return results
+
+    async def deleteAllByDateLessThanEqualReturning(self, date: datetime, limit: int, shardCount: int = None, shardIDs: list = None, includeDirect: bool = True) -> list[ReminderModel]:
+        """
+        Atomically claims up to limit due reminders by deleting and returning them in one statement.
+        Rows locked by another worker are skipped, so concurrent workers always receive disjoint batches.
+        Given shards, only reminders of guilds on those shards are claimed, plus DM reminders if includeDirect.
+        """
+        if (type(date) != datetime or not date):
+            self._logger.error(f"Incorrect datatype: date with type {type(date)}")
+            return None
+
+        if (type(limit) != int or limit <= 0):
+            self._logger.error(f"Incorrect datatype: limit with type {type(limit)}")
+            return None
+
+        async with self._session() as session:
+            try:
+                claimable = self._filterByShard(select(ReminderModel.id).filter(ReminderModel.endDate <= date), shardCount, shardIDs, includeDirect).order_by(ReminderModel.endDate).limit(limit).with_for_update(skip_locked=True).scalar_subquery()
+                query = delete(ReminderModel.__table__).where(ReminderModel.id.in_(claimable)).returning(*ReminderModel.__table__.columns)
+
+                results = [ReminderModel(**row._mapping) for row in await session.execute(query)]
+                await session.commit()
+            except Exception as e:
+                self._logger.error(e)
+                await session.rollback()
+                self._logger.error("Database delete error has occured with Reminder.deleteAllByDateLessThanEqualReturning.")
+                return None
+            else:
+                return results
@@ -1,7 +1,11 @@
+import os
+import time
+import asyncio
 from datetime import datetime, timedelta
 
 from src.models.event_model import EventModel
 from src.repository.event_repository import EventRespository
+from src.utils.event_timeline import EventTimeline
 from src.utils.logger import setup_logger
 
 class EventService:
@@ -9,50 +13,106 @@ class EventService:
         self._eventRespository = EventRespository()
         self._logger = setup_logger('bot.service.event', '/data/discord.log')
 
+        # Event queries are answered from memory. The timeline is rebuilt whenever events change here,
+        # and periodically in case another process changed them.
+        self._timeline: EventTimeline = None
+        self._timelineBuiltAt = 0.0
+        self._timelineTTL = float(os.environ.get("EVENT_TIMELINE_TTL", 300))
+        self._timelineLock = asyncio.Lock()
+
+        # Formatted dates per event id, computed once per rebuild. The version changes only when the set of events changes.
+        self._eventData: dict = {}
+        self._timelineSignature = None
+        self._timelineVersion = 0
+
+    async def rebuildTimeline(self) -> EventTimeline:
+        async with self._timelineLock:
+            events = await self._eventRespository.findAll()
+            if (events == None):
+                if (self._timeline == None):
+                    raise Exception("Unable to load events.")
+                self._logger.error("Unable to rebuild event timeline, keeping the previous one.")
+                return self._timeline
+
+            self._timeline = EventTimeline(events)
+            self._timelineBuiltAt = time.monotonic()
+            self._eventData = {event.id: self.formatEvent(event) for event in events}
+
+            signature = frozenset((event.id, event.name, event.startDate, event.endDate) for event in events)
+            if (signature != self._timelineSignature):
+                self._timelineSignature = signature
+                self._timelineVersion += 1
+
+            self._logger.info(f"Event timeline rebuilt with {len(self._timeline)} events.")
+            return self._timeline
+
+    async def getTimeline(self) -> EventTimeline:
+        if (self._timeline == None or time.monotonic() - self._timelineBuiltAt > self._timelineTTL):
+            return await self.rebuildTimeline()
+        return self._timeline
+
+    async def getEventsCacheInfo(self, days: int=None) -> tuple:
+        """
+        Returns the event set version, and the seconds until the events within the next number of days can change.
+        The seconds are None when no event boundary is left.
+        """
+        timeline = await self.getTimeline()
+        now = datetime.utcnow()
+        window = timedelta(days=days or 0)
+
+        # Results change when now passes a boundary, or when the end of the window reaches one
+        changes = []
+        nextBoundary = timeline.getNextBoundary(now)
+        if (nextBoundary):
+            changes.append(nextBoundary)
+        nextWindowBoundary = timeline.getNextBoundary(now + window)
+        if (nextWindowBoundary):
+            changes.append(nextWindowBoundary - window)
+
+        if (not changes):
+            return self._timelineVersion, None
+
+        return self._timelineVersion, max((min(changes) - now).total_seconds(), 0)
+
+    async def getNextEventBoundary(self, date: datetime) -> datetime:
+        """
+        Returns the first event start or end date after date, or None if there is none.
+        """
+        return (await self.getTimeline()).getNextBoundary(date)
+
     async def cleanExpiredEvents(self) -> None:
         # Clean events where end dates have passed
-        result_event: list[EventModel] = await self._eventRespository.findAllByEndDateLessThanEqual(datetime.utcnow())
-        if(result_event):
-            await self._eventRespository.deleteAll(result_event)
-            self._logger.info("Outdated events are cleaned.")
+        expiredEvents = await self._eventRespository.deleteAllByEndDateLessThanEqual(datetime.utcnow())
+        if(expiredEvents):
+            self._logger.info(f"{expiredEvents} outdated events are cleaned.")
         
-        # Clean events where start date have passed, with no end dates, and it's been a month since event started
-        result_content: list[EventModel] = await self._eventRespository.findAllByEndDate(None)
-        deletePile = []
-
-        if(result_content):
-            # Add EventModel to delete pile where startDate is 7 days ago
-            for result in result_content:
-                if (result.startDate <= datetime.utcnow() - timedelta(days=7)):
-                    deletePile.append(result)
-
-            if(deletePile):
-                await self._eventRespository.deleteAll(deletePile)
-                self._logger.info("Outdated content updates are cleaned.")
+        # Clean events with no end dates where the start date is 7 days ago
+        expiredContent = await self._eventRespository.deleteAllByEndDateIsNullAndStartDateLessThanEqual(datetime.utcnow() - timedelta(days=7))
+        if(expiredContent):
+            self._logger.info(f"{expiredContent} outdated content updates are cleaned.")
 
-        if (not (result_event or deletePile)):
+        if (not (expiredEvents or expiredContent)):
             self._logger.info("There are no outdated events.")
+        else:
+            await self.rebuildTimeline()
     
-    async def addEvents(self, events) -> bool:
+    async def addEvents(self, events) -> list:
+        """
+        Inserts scraped events that have not expired in one batch. Returns the events that were new, or None on failure.
+        """
         if(not events):
-            return False
-
-        # Query database to check if events already exists
-        results = []
-        for event in events:
-            results.append(await self._eventRespository.findByNameAndDate(name=event['event'], startDate=event['startDate'], endDate=event['endDate']))
-        
-        if (results == None or len(results) != len(events)):
-            self._logger.error("Something has went wrong with querying for existing events.")
-            return False
+            return []
 
         # Converting events to database models that have not expired
         eventModels = []
-        for index, event in enumerate(events):
-            # Don't add event if it already exist
-            if (results[index]):
+        eventKeys = set()
+        for event in events:
+            # Skip duplicates within the same scrape
+            key = (event['event'], event['startDate'], event.get('endDate'))
+            if (key in eventKeys):
                 continue
-            
+            eventKeys.add(key)
+
             # Create event model
             if ('endDate' in event.keys() and event['endDate']):
                 if (datetime.utcnow() > event['endDate']):
@@ -68,54 +128,72 @@ class EventService:
 
         if (not eventModels):
             self._logger.info("There are no new events added.")
-            return False
+            return []
+
+        # Insert models to db, existing events are skipped by the natural key
+        results = await self._eventRespository.saveAllIfNotExists(eventModels)
+        if (results == None):
+            self._logger.error("Something has went wrong with inserting events.")
+            return None
+
+        if (not results):
+            self._logger.info("There are no new events added.")
+            return []
 
-        # Insert models to db
-        result = await self._eventRespository.saveAll(eventModels)
-        if (result):
-            self._logger.info("Events are added to database successfully.")
+        self._logger.info(f"{len(results)} new events are added to database: {', '.join(result.name for result in results)}")
+        await self.rebuildTimeline()
+        return [{"event": result.name, "startDate": result.startDate, "endDate": result.endDate} for result in results]
     
+    async def applyEventChanges(self, changes: dict) -> bool:
+        """
+        Applies the added, changed and removed events of a scrape. Changed events replace their previous version.
+        Removed events are left to expire, as the page drops events before they end. Returns False on failure.
+        """
+        if (changes["removed"]):
+            self._logger.info(f"Events no longer listed: {', '.join(event['event'] for event in changes['removed'])}")
+
+        deleted = 0
+        if (changes["changed"]):
+            previous = [EventModel(name=change["previous"]["event"], startDate=change["previous"]["startDate"], endDate=change["previous"]["endDate"]) for change in changes["changed"]]
+            deleted = await self._eventRespository.deleteAllByNameAndDate(previous)
+            if (deleted == None):
+                return False
+            self._logger.info(f"Events changed: {', '.join(change['current']['event'] for change in changes['changed'])}")
+
+        results = await self.addEvents(changes["added"] + [change["current"] for change in changes["changed"]])
+        if (results == None):
+            return False
+
+        # addEvents already rebuilt the timeline if it inserted anything
+        if (deleted and not results):
+            await self.rebuildTimeline()
+        return True
+
     async def getCurrentEvents(self):
-        results = await self._eventRespository.findAllByDateBetween(date=datetime.utcnow(), order="asc")
-        
-        data = []
-        for result in results:
-            data.append({
-                "name": result.name, 
-                "startDate" : self.formatDiscordDate(result.startDate), 
-                "endDate" : self.formatDiscordDate(result.endDate),
-                "startDateRelative" : self.formatDiscordDateRelative(result.startDate), 
-                "endDateRelative" : self.formatDiscordDateRelative(result.endDate)})
+        results = (await self.getTimeline()).findAllByDateBetween(date=datetime.utcnow())
 
-        return data
+        # Copy so callers can modify the data without changing the formatted cache
+        return [dict(self._eventData[result.id]) for result in results]
 
     async def getEventsEnding(self, days:int):
-        results = await self._eventRespository.findAllByEndDateBetween(startDate=datetime.utcnow(), endDate = datetime.utcnow() + timedelta(days=days), order="asc")
-
-        data = []
-        for result in results:
-            data.append({
-                "name": result.name, 
-                "startDate" : self.formatDiscordDate(result.startDate), 
-                "endDate" : self.formatDiscordDate(result.endDate),
-                "startDateRelative" : self.formatDiscordDateRelative(result.startDate), 
-                "endDateRelative" : self.formatDiscordDateRelative(result.endDate)})
+        results = (await self.getTimeline()).findAllByEndDateBetween(startDate=datetime.utcnow(), endDate = datetime.utcnow() + timedelta(days=days))
 
-        return data
+        # Copy so callers can modify the data without changing the formatted cache
+        return [dict(self._eventData[result.id]) for result in results]
 
     async def getEventsUpcoming(self, days:int):
-        results = await self._eventRespository.findAllByStartDateBetween(startDate=datetime.utcnow(), endDate = datetime.utcnow() + timedelta(days=days), order="asc")
-
-        data = []
-        for result in results:
-            data.append({
-                "name": result.name, 
-                "startDate" : self.formatDiscordDate(result.startDate), 
-                "endDate" : self.formatDiscordDate(result.endDate),
-                "startDateRelative" : self.formatDiscordDateRelative(result.startDate), 
-                "endDateRelative" : self.formatDiscordDateRelative(result.endDate)})
-
-        return data
+        results = (await self.getTimeline()).findAllByStartDateBetween(startDate=datetime.utcnow(), endDate = datetime.utcnow() + timedelta(days=days))
+
+        # Copy so callers can modify the data without changing the formatted cache
+        return [dict(self._eventData[result.id]) for result in results]
+
+    def formatEvent(self, event: EventModel) -> dict:
+        return {
+            "name": event.name, 
+            "startDate" : self.formatDiscordDate(event.startDate), 
+            "endDate" : self.formatDiscordDate(event.endDate),
+            "startDateRelative" : self.formatDiscordDateRelative(event.startDate), 
+            "endDateRelative" : self.formatDiscordDateRelative(event.endDate)}
 
     def formatDiscordDate(self, date: datetime):
         if (not date):
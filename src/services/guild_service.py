@@ -1,43 +1,74 @@
+import os
+
 from src.repository.guild_repository import GuildRespository
 from src.models.guild_model import GuildModel
+from src.utils.cache import TTLCache, MISSING
 
 class GuildService:
     def __init__(self):
         self._guildRepository = GuildRespository()
 
-    async def addGuild(self, id: int, notificationChannelID: int=None, roleID:int=None) -> bool:
-        result = await self._guildRepository.findByID(id)
-
-        # Guild exist
-        if (result):
-            return False
+        # Guild settings rarely change, so reads are served from memory and invalidated on every write
+        self._cache = TTLCache(maxSize=int(os.environ.get("GUILD_CACHE_SIZE", 10000)), ttl=float(os.environ.get("GUILD_CACHE_TTL", 600)))
 
-        # Create new guild
+    async def addGuild(self, id: int, notificationChannelID: int=None, roleID:int=None) -> bool:
+        # Create new guild, unless the guild exist
         guild = GuildModel(id=id, notificationChannelID=notificationChannelID, roleID=roleID)
-        result_guild = await self._guildRepository.save(guild)
+        result_guild = await self._guildRepository.saveIfNotExists(guild)
+        self._cache.invalidate(id)
         
         return result_guild
 
     async def updateGuild (self, id: int, notificationChannelID:int = None, roleID:int = None) -> bool:
-        result = await self._guildRepository.findByID(id)
-        
-        # check if guild exist, then create one if there is no guild
-        if (result):
-            return await self._guildRepository.update(id=id, notificationChannelID=notificationChannelID, roleID=roleID)
-        else:
-            return await self.addGuild(id=id, notificationChannelID=notificationChannelID, roleID=roleID)
+        # Update guild, or create one if there is no guild
+        result = await self._guildRepository.saveOrUpdate(id=id, notificationChannelID=notificationChannelID, roleID=roleID)
+        self._cache.invalidate(id)
+
+        return result
 
     async def deleteGuild (self, id:int) -> bool:
-        result = await self._guildRepository.findByID(id)
+        result = await self._guildRepository.deleteByID(id)
+        self._cache.invalidate(id)
 
-        if (result):
-            return await self._guildRepository.delete(result)
-        
-        return False
+        return result
 
     async def getServerSettings (self, id: int):
-        result = await self._guildRepository.findByID(id=id)
-        if (result):
-            return {"notificationChannelID": result.notificationChannelID, "roleID": result.roleID}
-        else:
-            return None
\ No newline at end of file
+        settings = self._cache.get(id)
+        if (settings is MISSING):
+            result = await self._guildRepository.findByID(id=id)
+            if (result):
+                settings = {"notificationChannelID": result.notificationChannelID, "roleID": result.roleID}
+            else:
+                settings = None
+            self._cache.set(id, settings)
+
+        # Copy so callers cannot modify the cached settings
+        return dict(settings) if settings else None
+
+    async def getAllServerSettings (self, ids: list[int]) -> dict:
+        """
+        Returns the settings of every guild in ids, keyed by guild id. Guilds missing from the cache are loaded with one query.
+        """
+        settings = {}
+        uncachedIDs = []
+        for id in ids:
+            cached = self._cache.get(id)
+            if (cached is MISSING):
+                uncachedIDs.append(id)
+            else:
+                settings[id] = cached
+
+        if (uncachedIDs):
+            # Guilds are left out of the result, and uncached, if the query fails
+            results = await self._guildRepository.findAllByIDs(uncachedIDs)
+            if (results != None):
+                found = {result.id: {"notificationChannelID": result.notificationChannelID, "roleID": result.roleID} for result in results}
+                for id in uncachedIDs:
+                    settings[id] = found.get(id, None)
+                    self._cache.set(id, settings[id])
+
+        # Copy so callers cannot modify the cached settings
+        return {id: (dict(value) if value else None) for id, value in settings.items()}
+
+    def getCacheStats(self) -> dict:
+        return self._cache.getStats()
@@ -0,0 +1,100 @@
+import os
+import asyncio
+
+from src.services.event_service import EventService
+from src.sources.event_source import EventSource
+from src.sources.crunchyroll_source import CrunchyrollSource
+from src.sources.json_feed_source import JsonFeedSource
+from src.utils.http_client import HttpClient
+from src.utils.logger import setup_logger
+
+class IngestionService:
+    """
+    Fetches every event source concurrently and applies their merged changes in one pass.
+    A source that fails or times out is skipped, and retried from the same snapshot on the next run.
+    """
+    def __init__(self, eventService: EventService, sources: list = None):
+        self._eventService = eventService
+        self._httpClient = HttpClient()
+        self._sources: list[EventSource] = sources if sources != None else self.loadSources()
+        self._logger = setup_logger('bot.service.ingestion', '/data/discord.log')
+
+    def loadSources(self) -> list:
+        """
+        Creates the sources named in EVENT_SOURCES, plus one json feed source per url in EVENT_JSON_FEEDS.
+        """
+        sources = []
+        names = [name.strip() for name in os.environ.get("EVENT_SOURCES", "crunchyroll").split(",") if name.strip()]
+        if ("crunchyroll" in names):
+            sources.append(CrunchyrollSource(httpClient=self._httpClient))
+
+        for url in os.environ.get("EVENT_JSON_FEEDS", "").split(","):
+            if (url.strip()):
+                sources.append(JsonFeedSource(url=url.strip(), httpClient=self._httpClient))
+
+        return sources
+
+    async def fetchSource(self, source: EventSource) -> dict:
+        try:
+            changes = await asyncio.wait_for(source.fetch_changes(), timeout=source.timeout)
+        except asyncio.TimeoutError:
+            self._logger.error(f"Event source {source.name} timed out after {source.timeout} seconds.")
+            return None
+        except Exception as e:
+            self._logger.error(e)
+            self._logger.error(f"Event source {source.name} has failed.")
+            return None
+
+        if (changes == None):
+            self._logger.error(f"Event source {source.name} returned no data.")
+        return changes
+
+    def mergeChanges(self, results: list) -> dict:
+        """
+        Merges the changes of every source, dropping events that more than one source reported.
+        """
+        merged = {"added": [], "changed": [], "removed": []}
+        seen = {"added": set(), "changed": set(), "removed": set()}
+
+        for changes in results:
+            for kind in merged.keys():
+                for item in changes[kind]:
+                    event = item["current"] if kind == "changed" else item
+                    key = (event["event"], event["startDate"], event.get("endDate"))
+                    if (key in seen[kind]):
+                        continue
+                    seen[kind].add(key)
+                    merged[kind].append(item)
+
+        return merged
+
+    async def run(self) -> dict:
+        """
+        Fetches and applies the changes of every source. Returns the merged changes, or None if nothing could be applied.
+        """
+        if (not self._sources):
+            self._logger.info("There are no event sources configured.")
+            return {"added": [], "changed": [], "removed": []}
+
+        results = await asyncio.gather(*(self.fetchSource(source) for source in self._sources))
+        fetched = [(source, changes) for source, changes in zip(self._sources, results) if changes != None]
+        if (not fetched):
+            return None
+
+        merged = self.mergeChanges([changes for _, changes in fetched])
+        if (not (merged["added"] or merged["changed"] or merged["removed"])):
+            self._logger.info("There are no changes in any event source.")
+        elif (not await self._eventService.applyEventChanges(merged)):
+            return None
+
+        # Snapshots only move forward once their changes are stored
+        for source, _ in fetched:
+            source.commit()
+
+        self._logger.info(f"{len(fetched)} of {len(self._sources)} event sources ingested.")
+        return merged
+
+    async def close(self) -> None:
+        for source in self._sources:
+            await source.close()
+        await self._httpClient.close()
@@ -1,34 +1,98 @@
-from datetime import datetime
+import os
+import asyncio
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable
 
 from src.repository.reminder_repository import ReminderRespository
 from src.models.reminder_model import ReminderModel
+from src.utils.reminder_scheduler import ReminderScheduler
+from src.utils.cluster import get_cluster_shard_ids, get_shard_count, is_primary_cluster
+from src.utils.logger import setup_logger
 
 class ReminderService:
     def __init__(self):
         self._reminderRepository = ReminderRespository()
+        self._batchSize = int(os.environ.get("REMINDER_BATCH_SIZE", 100))
+        self._windowSeconds = int(os.environ.get("REMINDER_WINDOW_SECONDS", 300))
+        self._scheduler = ReminderScheduler()
+
+        # In cluster mode each cluster delivers the reminders of its own guilds, and the primary cluster delivers DM reminders
+        self._shardFilter = {"shardCount": get_shard_count(), "shardIDs": get_cluster_shard_ids(), "includeDirect": is_primary_cluster()}
+        self._logger = setup_logger('bot.service.reminder', '/data/discord.log')
 
     async def addReminder(self, date:datetime, description:str, userID: int, guildID: int=None, channelID: int=None):
         reminder = ReminderModel(startDate=datetime.utcnow(), endDate=date, description=description, userID=userID, guildID=guildID, channelID=channelID)
         result = await self._reminderRepository.save(reminder)
+
+        # Wake the scheduler if this reminder is due before the one it is waiting on
+        if (result):
+            self._scheduler.schedule(date)
         return result
 
     async def deleteAllReminders(self, userID: int):
-        result = await self._reminderRepository.findAllByUserID(id=userID)
-        
-        if (result):
-            return await self._reminderRepository.deleteAll(result)
-        else:
-            return False
+        result = await self._reminderRepository.deleteAllByUserID(id=userID)
+        return bool(result)
 
-    async def getAndDeleteOldReminders(self):
-        reminders = await self._reminderRepository.findAllByDateLessThanEqual(date=datetime.utcnow())
+    async def getAndDeleteOldReminders(self) -> list[ReminderModel]:
+        """
+        Claims one batch of due reminders. Safe to run from several workers at once, each receives a disjoint batch.
+        """
+        reminders = await self._reminderRepository.deleteAllByDateLessThanEqualReturning(date=datetime.utcnow(), limit=self._batchSize, **self._shardFilter)
         
         if (not reminders):
             return None
         
-        result = await self._reminderRepository.deleteAll(reminders)
+        return reminders
 
-        if (result):
-            return reminders
-        else:
-            return None
+    def getBatchSize(self) -> int:
+        return self._batchSize
+
+    def getLagStats(self) -> dict:
+        return self._scheduler.getLagStats()
+
+    async def deliverDueReminders(self, deliver: Callable[[ReminderModel], Awaitable[None]]) -> None:
+        # Claim due reminders in batches until there are none left
+        while True:
+            reminders = await self.getAndDeleteOldReminders()
+            if (not reminders):
+                return
+
+            for reminder in reminders:
+                self._scheduler.recordLag((datetime.utcnow() - reminder.endDate).total_seconds())
+                await deliver(reminder)
+
+            if (len(reminders) < self._batchSize):
+                return
+
+    async def runScheduler(self, deliver: Callable[[ReminderModel], Awaitable[None]]) -> None:
+        """
+        Delivers reminders as they become due. Due dates are loaded from the database one window at a time,
+        and the scheduler sleeps until the earliest one instead of polling.
+        """
+        while True:
+            try:
+                now = datetime.utcnow()
+
+                # Load the next window of due dates, including any that are already overdue
+                if (now >= self._scheduler.getWindowEnd()):
+                    windowEnd = now + timedelta(seconds=self._windowSeconds)
+                    self._scheduler.beginLoad(windowEnd)
+                    dates = await self._reminderRepository.findAllEndDateByDateLessThanEqual(date=windowEnd, **self._shardFilter)
+                    if (dates == None):
+                        self._logger.error("Unable to load upcoming reminders, retrying in a minute.")
+                        dates, windowEnd = [], now + timedelta(minutes=1)
+                    self._scheduler.reset(dates, windowEnd)
+
+                nextDate = self._scheduler.peek()
+                if (nextDate and nextDate <= now):
+                    self._scheduler.popDue(now)
+                    await self.deliverDueReminders(deliver)
+                    continue
+
+                await self._scheduler.sleepUntil(min(nextDate, self._scheduler.getWindowEnd()) if nextDate else self._scheduler.getWindowEnd())
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._logger.error(e)
+                self._logger.error("Something was wrong with scheduling reminders.")
+                await asyncio.sleep(60)
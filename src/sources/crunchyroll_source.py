@@ -0,0 +1,20 @@
+from src.sources.event_source import EventSource
+from src.utils.http_client import HttpClient
+from src.utils.web_scraper import WebScraper
+
+class CrunchyrollSource(EventSource):
+    """
+    Events scraped from the Crunchyroll Princess Connect update page.
+    """
+    def __init__(self, httpClient: HttpClient = None, timeout: float = None):
+        EventSource.__init__(self, name="crunchyroll", timeout=timeout)
+        self._webScraper = WebScraper(httpClient=httpClient)
+
+    async def fetch_changes(self) -> dict:
+        return await self._webScraper.scrape_crunchyroll_changes()
+
+    def commit(self) -> None:
+        self._webScraper.commit_snapshot()
+
+    async def close(self) -> None:
+        await self._webScraper.close()
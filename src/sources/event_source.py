@@ -0,0 +1,26 @@
+import os
+from abc import ABC, abstractmethod
+
+class EventSource(ABC):
+    """
+    A place events are ingested from. Sources report what changed since their last committed fetch,
+    as {"added": [...], "changed": [{"previous", "current"}], "removed": [...]} of {"event", "startDate", "endDate"} dicts.
+    """
+    def __init__(self, name: str, timeout: float = None):
+        self.name = name
+        self.timeout = timeout if timeout else float(os.environ.get("EVENT_SOURCE_TIMEOUT", 60))
+
+    @abstractmethod
+    async def fetch_changes(self) -> dict:
+        """
+        Returns the changes since the last commit, or None on failure.
+        """
+
+    def commit(self) -> None:
+        """
+        Called once the changes from the last fetch have been applied.
+        """
+        pass
+
+    async def close(self) -> None:
+        pass
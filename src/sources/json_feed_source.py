@@ -0,0 +1,71 @@
+import os
+import json
+import time
+import hashlib
+from datetime import datetime, timezone
+
+from src.sources.event_source import EventSource
+from src.utils.http_client import HttpClient
+from src.utils.scrape_snapshot import ScrapeSnapshot
+from src.utils.logger import setup_logger
+from src.utils.metrics import SCRAPER_FETCH_DURATION, SCRAPER_PARSE_DURATION
+
+class JsonFeedSource(EventSource):
+    """
+    Events from a json feed: a list of {"name", "startDate", "endDate"} objects with ISO 8601 UTC dates, endDate optional.
+    """
+    def __init__(self, url: str, httpClient: HttpClient, timeout: float = None):
+        EventSource.__init__(self, name=f"json:{url}", timeout=timeout)
+        self._url = url
+        self._httpClient = httpClient
+        self._pendingValidators: dict = None
+        self._snapshot = ScrapeSnapshot(os.path.join(os.environ.get("FEED_SNAPSHOT_DIR", "/data"), f"feed_snapshot_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]}.json"))
+        self._logger = setup_logger('bot.sources.jsonfeed', '/data/discord.log')
+
+    async def fetch_changes(self) -> dict:
+        # Changes from an earlier fetch that was never applied must not be committed by this one
+        self._snapshot.discard()
+        self._pendingValidators = None
+
+        startedAt = time.perf_counter()
+        response = await self._httpClient.fetch(self._url)
+        SCRAPER_FETCH_DURATION.observe(time.perf_counter() - startedAt, source="json")
+        if (not response or response["status"] >= 400):
+            self._logger.error(f"Json feed request to {self._url} failed.")
+            return None
+
+        if (response["notModified"]):
+            return {"added": [], "changed": [], "removed": []}
+
+        startedAt = time.perf_counter()
+        events = []
+        for item in json.loads(response["content"]):
+            try:
+                events.append({
+                    "event": item["name"],
+                    "startDate": self.parseDate(item["startDate"]),
+                    "endDate": self.parseDate(item["endDate"]) if item.get("endDate") else None})
+            except Exception as e:
+                self._logger.error(e)
+                self._logger.error(f"Something went wrong with reading an event from {self._url}.")
+
+        SCRAPER_PARSE_DURATION.observe(time.perf_counter() - startedAt, source="json")
+        self._pendingValidators = response["validators"]
+        return self._snapshot.diff(events)
+
+    def parseDate(self, date: str) -> datetime:
+        """
+        Converts an ISO 8601 date to the naive UTC datetime events are stored as.
+        """
+        # fromisoformat only accepts the Z suffix from python 3.11
+        if (date.endswith(("Z", "z"))):
+            date = date[:-1] + "+00:00"
+        date = datetime.fromisoformat(date)
+        if (date.tzinfo):
+            date = date.astimezone(timezone.utc).replace(tzinfo=None)
+        return date
+
+    def commit(self) -> None:
+        self._snapshot.commit()
+        self._httpClient.commitValidators(self._url, self._pendingValidators)
+        self._pendingValidators = None
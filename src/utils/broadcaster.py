@@ -0,0 +1,87 @@
+import os
+import time
+import asyncio
+from typing import Awaitable, Callable
+
+from src.utils.logger import setup_logger
+from src.utils.cluster import get_cluster_count
+from src.utils.metrics import BROADCAST_MESSAGES, BROADCAST_THROUGHPUT
+
+class RateLimiter:
+    """
+    Token bucket allowing rate acquisitions per second on average, and bursts of up to burst. Without a burst,
+    acquisitions are evenly spaced so no one second window ever exceeds the rate.
+    """
+    def __init__(self, rate: float, burst: float = None):
+        self._rate = rate
+        self._burst = burst if burst else 1
+        self._tokens = self._burst
+        self._updatedAt = time.monotonic()
+
+    async def acquire(self) -> None:
+        while True:
+            now = time.monotonic()
+            self._tokens = min(self._burst, self._tokens + (now - self._updatedAt) * self._rate)
+            self._updatedAt = now
+
+            if (self._tokens >= 1):
+                self._tokens -= 1
+                return
+
+            await asyncio.sleep((1 - self._tokens) / self._rate)
+
+class Broadcaster:
+    """
+    Runs many message sends concurrently. The number of requests in flight is bounded, and the request rate is
+    kept under Discord's global limit. Per-route buckets are already respected by discord.py's HTTP client.
+    """
+    def __init__(self, concurrency: int = None, rate: float = None, progressInterval: float = 10):
+        self._concurrency = concurrency if concurrency else int(os.environ.get("BROADCAST_CONCURRENCY", 20))
+        # The global limit is per bot token, so in cluster mode every cluster gets an equal share of the rate
+        self._rate = rate if rate else float(os.environ.get("BROADCAST_RATE", 40)) / get_cluster_count()
+        self._progressInterval = progressInterval
+        self._logger = setup_logger('bot.utils.broadcaster', '/data/discord.log')
+        self.lastStats: dict = None
+
+    async def broadcast(self, jobs: list[tuple[str, Callable[[], Awaitable]]]) -> dict:
+        """
+        Runs every (label, send) job and returns the number sent, failed, and the throughput in messages per second.
+        """
+        limiter = RateLimiter(rate=self._rate)
+        pending = iter(jobs)
+        stats = {"total": len(jobs), "sent": 0, "failed": 0, "seconds": 0.0, "throughput": 0.0}
+        startedAt = time.monotonic()
+
+        async def worker():
+            for label, send in pending:
+                await limiter.acquire()
+                try:
+                    await send()
+                    stats["sent"] += 1
+                    BROADCAST_MESSAGES.inc(result="sent")
+                except Exception as e:
+                    stats["failed"] += 1
+                    BROADCAST_MESSAGES.inc(result="failed")
+                    self._logger.error(e)
+                    self._logger.error(f"Something went wrong with broadcasting to {label}.")
+
+        async def reportProgress():
+            while True:
+                await asyncio.sleep(self._progressInterval)
+                elapsed = time.monotonic() - startedAt
+                done = stats["sent"] + stats["failed"]
+                self._logger.info(f"Broadcast progress: {done}/{stats['total']} in {elapsed:.1f} seconds ({done / elapsed:.1f} messages per second).")
+
+        progress = asyncio.create_task(reportProgress())
+        try:
+            await asyncio.gather(*(worker() for _ in range(min(self._concurrency, len(jobs)))))
+        finally:
+            progress.cancel()
+
+        stats["seconds"] = time.monotonic() - startedAt
+        stats["throughput"] = stats["sent"] / stats["seconds"] if stats["seconds"] > 0 else 0.0
+        self._logger.info(f"Broadcast finished: {stats['sent']} sent, {stats['failed']} failed in {stats['seconds']:.1f} seconds ({stats['throughput']:.1f} messages per second).")
+
+        BROADCAST_THROUGHPUT.set(stats["throughput"])
+        self.lastStats = stats
+        return stats
@@ -0,0 +1,46 @@
+import time
+from collections import OrderedDict
+
+# Returned by TTLCache.get when a key is absent, since None is a valid cached value
+MISSING = object()
+
+class TTLCache:
+    """
+    Bounded least recently used cache where every entry also expires after a time to live.
+    """
+    def __init__(self, maxSize: int = 1024, ttl: float = 300):
+        self._maxSize = maxSize
+        self._ttl = ttl
+        self._entries: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=MISSING):
+        entry = self._entries.get(key, None)
+        if (entry is None or entry[0] <= time.monotonic()):
+            if (entry is not None):
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, value, ttl: float = None) -> None:
+        # An entry may expire sooner than the cache wide time to live
+        self._entries[key] = (time.monotonic() + (self._ttl if ttl is None else min(ttl, self._ttl)), value)
+        self._entries.move_to_end(key)
+
+        # Evict least recently used entries once full
+        while (len(self._entries) > self._maxSize):
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key) -> None:
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def getStats(self) -> dict:
+        return {"size": len(self._entries), "maxSize": self._maxSize, "ttl": self._ttl, "hits": self.hits, "misses": self.misses}
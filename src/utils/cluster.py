@@ -0,0 +1,108 @@
+import os
+import time
+import signal
+import asyncio
+import multiprocessing
+from typing import Callable
+
+import discord
+
+from src.utils.logger import setup_logger
+
+# A cluster is one process running a contiguous group of shards. CLUSTER_ID is set by the launcher for each process,
+# and a process started without it runs every shard by itself.
+
+def get_cluster_id() -> int:
+    return int(os.environ.get("CLUSTER_ID", 0))
+
+def get_cluster_count() -> int:
+    return max(int(os.environ.get("CLUSTER_COUNT", 1)), 1)
+
+def get_shard_count() -> int:
+    """
+    Returns the total number of shards, or None to let discord decide when running a single cluster.
+    """
+    shardCount = os.environ.get("SHARD_COUNT", None)
+    return int(shardCount) if shardCount else None
+
+def is_primary_cluster() -> bool:
+    """
+    Jobs that must run once across all clusters, like scraping and syncing commands, run on the primary cluster.
+    """
+    return get_cluster_id() == 0
+
+def is_clustered() -> bool:
+    return get_cluster_count() > 1
+
+def get_cluster_shard_ids(clusterID: int = None) -> list:
+    """
+    Returns the shard ids run by a cluster, or None when one process runs every shard.
+    """
+    shardCount = get_shard_count()
+    if (not is_clustered() or shardCount == None):
+        return None
+
+    clusterID = get_cluster_id() if clusterID == None else clusterID
+    clusterCount = get_cluster_count()
+    return list(range(clusterID * shardCount // clusterCount, (clusterID + 1) * shardCount // clusterCount))
+
+async def fetch_recommended_shard_count(token: str) -> int:
+    http = discord.http.HTTPClient(loop=asyncio.get_running_loop())
+    try:
+        await http.static_login(token)
+        shardCount, _ = await http.get_bot_gateway()
+        return shardCount
+    finally:
+        await http.close()
+
+def _run_cluster(target: Callable[[str], None], clusterID: int, token: str) -> None:
+    os.environ["CLUSTER_ID"] = str(clusterID)
+    target(token)
+
+def launch_clusters(target: Callable[[str], None], token: str) -> None:
+    """
+    Runs target(token) in one process per cluster, and restarts a cluster if its process dies.
+    Every process is spawned fresh, so none of them inherit this process' log listeners or connections.
+    """
+    logger = setup_logger('bot.cluster', '/data/discord.log')
+    clusterCount = get_cluster_count()
+
+    # Every cluster must agree on the shard count to split shards and claim reminders the same way
+    shardCount = get_shard_count()
+    if (shardCount == None):
+        shardCount = asyncio.run(fetch_recommended_shard_count(token))
+    shardCount = max(shardCount, clusterCount)
+    os.environ["SHARD_COUNT"] = str(shardCount)
+    logger.info(f"Launching {clusterCount} clusters for {shardCount} shards.")
+
+    context = multiprocessing.get_context("spawn")
+    processes = {}
+
+    def start(clusterID: int) -> None:
+        processes[clusterID] = context.Process(target=_run_cluster, args=(target, clusterID, token), name=f"cluster-{clusterID}")
+        processes[clusterID].start()
+        logger.info(f"Cluster {clusterID} started with shards {get_cluster_shard_ids(clusterID)}.")
+
+    def stop(signum, frame) -> None:
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    try:
+        for clusterID in range(clusterCount):
+            start(clusterID)
+
+        restartDelay = float(os.environ.get("CLUSTER_RESTART_DELAY", 5))
+        while True:
+            time.sleep(restartDelay)
+            for clusterID, process in list(processes.items()):
+                if (not process.is_alive()):
+                    logger.error(f"Cluster {clusterID} exited with code {process.exitcode}, restarting.")
+                    start(clusterID)
+    except (KeyboardInterrupt, SystemExit):
+        logger.info("Stopping clusters.")
+    finally:
+        for process in processes.values():
+            if (process.is_alive()):
+                process.terminate()
+        for process in processes.values():
+            process.join(timeout=30)
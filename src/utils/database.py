@@ -0,0 +1,73 @@
+import os
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from src.models.model import Base
+from src.utils.logger import setup_logger
+from src.utils.secrets import get_secrets
+
+# Process-wide engine and session factory, shared by every repository
+_engine: AsyncEngine = None
+_session: sessionmaker = None
+
+# Secrets needed to connect, fetched together with the bot token at startup
+DATABASE_SECRETS = ['POSTGRES_USER', 'POSTGRES_PASSWORD', 'POSTGRES_HOST', 'POSTGRES_PORT', 'POSTGRES_NAME']
+
+def _build_database_url() -> str:
+    secrets = get_secrets(DATABASE_SECRETS)
+    postgres_user = secrets['POSTGRES_USER']
+    postgres_password = secrets['POSTGRES_PASSWORD']
+    postgres_host = secrets['POSTGRES_HOST']
+    postgres_port = secrets['POSTGRES_PORT']
+    postgres_name = secrets['POSTGRES_NAME']
+
+    return f"postgresql+asyncpg://{postgres_user}:{postgres_password}@{postgres_host}:{postgres_port}/{postgres_name}"
+
+def get_engine() -> AsyncEngine:
+    """
+    Returns the shared async engine, creating it and its connection pool on first use.
+    """
+    global _engine
+    if (_engine is None):
+        _engine = create_async_engine(
+            _build_database_url(),
+            pool_size=int(os.environ.get("POSTGRES_POOL_SIZE", 5)),
+            max_overflow=int(os.environ.get("POSTGRES_MAX_OVERFLOW", 10)),
+            pool_timeout=float(os.environ.get("POSTGRES_POOL_TIMEOUT", 30)),
+            pool_recycle=int(os.environ.get("POSTGRES_POOL_RECYCLE", 1800)),
+            pool_pre_ping=True
+            )
+    return _engine
+
+def get_session() -> sessionmaker:
+    """
+    Returns the shared AsyncSession factory bound to the shared engine.
+    """
+    global _session
+    if (_session is None):
+        _session = sessionmaker(bind=get_engine(), class_=AsyncSession, expire_on_commit=False)
+    return _session
+
+async def create_schema() -> None:
+    """
+    Creates any missing tables. Should be called once at startup, before run_migrations and before repositories are used.
+    """
+    # Models must be imported so they are registered on Base.metadata
+    import src.models.event_model
+    import src.models.guild_model
+    import src.models.reminder_model
+
+    logger = setup_logger('bot.database', '/data/discord.log')
+    async with get_engine().begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+    logger.info("Database schema is ready.")
+
+async def dispose_engine() -> None:
+    """
+    Closes every pooled connection. Should be called once on shutdown.
+    """
+    global _engine, _session
+    if (_engine is not None):
+        await _engine.dispose()
+    _engine = None
+    _session = None
@@ -0,0 +1,48 @@
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+
+from src.models.event_model import EventModel
+
+class EventTimeline:
+    """
+    Immutable in-memory index of events sorted by start and end date, answering range queries with bisect.
+    """
+    def __init__(self, events: list[EventModel]):
+        self._byStartDate = sorted(events, key=lambda event: (event.startDate, event.id))
+        self._startDates = [event.startDate for event in self._byStartDate]
+
+        # Events without an end date never match an end date range, the same as NULL comparisons in SQL
+        self._byEndDate = sorted([event for event in events if event.endDate], key=lambda event: (event.endDate, event.id))
+        self._endDates = [event.endDate for event in self._byEndDate]
+
+        # Every instant at which an event starts or ends, which is when any query result can change
+        self._boundaries = sorted(set(self._startDates + self._endDates))
+
+    def __len__(self) -> int:
+        return len(self._byStartDate)
+
+    def findAllByDateBetween(self, date: datetime) -> list[EventModel]:
+        """
+        Events where startDate <= date <= endDate, ordered by endDate.
+        """
+        index = bisect_left(self._endDates, date)
+        return [event for event in self._byEndDate[index:] if event.startDate <= date]
+
+    def findAllByStartDateBetween(self, startDate: datetime, endDate: datetime) -> list[EventModel]:
+        """
+        Events where startDate falls within [startDate, endDate], ordered by startDate.
+        """
+        return self._byStartDate[bisect_left(self._startDates, startDate):bisect_right(self._startDates, endDate)]
+
+    def findAllByEndDateBetween(self, startDate: datetime, endDate: datetime) -> list[EventModel]:
+        """
+        Events where endDate falls within [startDate, endDate], ordered by endDate.
+        """
+        return self._byEndDate[bisect_left(self._endDates, startDate):bisect_right(self._endDates, endDate)]
+
+    def getNextBoundary(self, date: datetime) -> datetime:
+        """
+        The first event start or end date strictly after date, or None if there is none.
+        """
+        index = bisect_right(self._boundaries, date)
+        return self._boundaries[index] if index < len(self._boundaries) else None
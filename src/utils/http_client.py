@@ -0,0 +1,75 @@
+import os
+import random
+import asyncio
+import aiohttp
+
+from src.utils.logger import setup_logger
+
+class HttpClient:
+    """
+    Shared aiohttp session with timeouts, retries with exponential backoff, and conditional GET requests.
+    """
+    def __init__(self, timeout: float = None, retries: int = None, backoff: float = None):
+        self._timeout = aiohttp.ClientTimeout(total=timeout if timeout else float(os.environ.get("HTTP_TIMEOUT", 15)))
+        self._retries = retries if retries != None else int(os.environ.get("HTTP_RETRIES", 3))
+        self._backoff = backoff if backoff else float(os.environ.get("HTTP_BACKOFF", 1))
+        self._session: aiohttp.ClientSession = None
+
+        # ETag and Last-Modified of the last response per url that the caller confirmed it processed
+        self._validators: dict[str, dict] = {}
+        self._logger = setup_logger('bot.utils.httpclient', '/data/discord.log')
+
+    def _getSession(self) -> aiohttp.ClientSession:
+        # The session must be created inside the running event loop, so it is created on first use
+        if (self._session is None or self._session.closed):
+            self._session = aiohttp.ClientSession(timeout=self._timeout)
+        return self._session
+
+    async def fetch(self, url: str, conditional: bool = True) -> dict:
+        """
+        Fetches url and returns {"status", "content", "notModified", "validators"}, or None if every attempt failed.
+        When conditional, the last committed ETag and Last-Modified are sent and an unchanged page returns notModified with no content.
+        Validators of a successful response are only sent again once passed to commitValidators.
+        """
+        headers = {}
+        validators = self._validators.get(url, {})
+        if (conditional and validators.get("etag")):
+            headers["If-None-Match"] = validators["etag"]
+        if (conditional and validators.get("lastModified")):
+            headers["If-Modified-Since"] = validators["lastModified"]
+
+        for attempt in range(self._retries + 1):
+            try:
+                async with self._getSession().get(url, headers=headers) as response:
+                    if (response.status == 304):
+                        return {"status": response.status, "content": None, "notModified": True, "validators": None}
+
+                    # Retry server errors and rate limits, anything else is final
+                    if (response.status < 500 and response.status != 429):
+                        content = await response.read()
+                        validators = None
+                        if (response.ok):
+                            validators = {"etag": response.headers.get("ETag"), "lastModified": response.headers.get("Last-Modified")}
+                        return {"status": response.status, "content": content, "notModified": False, "validators": validators}
+
+                    self._logger.warning(f"Request to {url} returned {response.status}, attempt {attempt + 1}.")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                self._logger.warning(f"Request to {url} failed with {type(e).__name__}, attempt {attempt + 1}.")
+
+            if (attempt < self._retries):
+                await asyncio.sleep(self._backoff * (2 ** attempt) * (1 + random.random()))
+
+        self._logger.error(f"Request to {url} failed after {self._retries + 1} attempts.")
+        return None
+
+    def commitValidators(self, url: str, validators: dict) -> None:
+        """
+        Makes later requests to url conditional on a response the caller has fully processed.
+        """
+        if (validators):
+            self._validators[url] = validators
+
+    async def close(self) -> None:
+        if (self._session is not None and not self._session.closed):
+            await self._session.close()
+        self._session = None
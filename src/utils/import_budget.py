@@ -0,0 +1,53 @@
+import os
+import re
+import sys
+import subprocess
+
+# Modules that only the production path or the scrape worker needs, and so must not be imported at startup
+LAZY_MODULES = ("google.cloud", "grpc", "bs4", "lxml", "cryptography")
+
+IMPORT_TIME_PATTERN = re.compile(r"import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+def measure_imports(modules: list) -> list:
+    """
+    Imports modules in a fresh interpreter and returns (module, self microseconds, cumulative microseconds, depth) for every import.
+    """
+    environment = dict(os.environ, PRODUCTION="0", PYTHONDONTWRITEBYTECODE="1")
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "; ".join(f"import {module}" for module in modules)],
+        capture_output=True, text=True, env=environment)
+    if (result.returncode != 0):
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    imports = []
+    for line in result.stderr.splitlines():
+        match = IMPORT_TIME_PATTERN.match(line)
+        if (match):
+            imports.append((match.group(4), int(match.group(1)), int(match.group(2)), (len(match.group(3)) - 1) // 2))
+    return imports
+
+def main() -> int:
+    # Cogs are imported by setup_hook before the bot connects, so they count towards cold start
+    modules = ["main"] + sorted(f"src.cogs.{filename[:-3]}" for filename in os.listdir("./src/cogs") if filename.endswith(".py"))
+    budget = float(os.environ.get("IMPORT_TIME_BUDGET", 2000))
+
+    imports = measure_imports(modules)
+    total = sum(cumulative for _, _, cumulative, depth in imports if depth == 0) / 1000
+
+    print(f"{'module':<50} {'cumulative ms':>14}")
+    for name, _, cumulative, _ in sorted(imports, key=lambda item: item[2], reverse=True)[:20]:
+        print(f"{name:<50} {cumulative / 1000:>14.1f}")
+    print(f"\nTotal import time: {total:.1f} ms, budget {budget:.0f} ms.")
+
+    failed = False
+    eager = [module for module in LAZY_MODULES if any(name == module or name.startswith(f"{module}.") for name, _, _, _ in imports)]
+    if (eager):
+        print(f"Imported at startup but should be lazy: {', '.join(eager)}")
+        failed = True
+    if (total > budget):
+        print("Import time is over budget.")
+        failed = True
+
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
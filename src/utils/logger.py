@@ -1,18 +1,61 @@
 import logging
 import os
-import google.cloud.logging
-from google.cloud.logging_v2.handlers import CloudLoggingHandler
+import queue
+import atexit
+import threading
+from logging.handlers import QueueHandler, QueueListener
 
-def setup_logger(name: str, log_file:str = '/data/discord.log', level = logging.INFO):
-    if (int(os.environ.get("PRODUCTION", 0)) == 1):
-        client = google.cloud.logging.Client()
-        handler = CloudLoggingHandler(client)
-    else:
-        handler = logging.FileHandler(log_file)
-        handler.setFormatter(logging.Formatter('[%(asctime)s] [%(levelname)-8s] %(name)s: %(message)s', '%Y-%m-%d %H:%M:%S'))
+# One queue and listener thread per destination. Loggers only enqueue records, so file and cloud I/O never runs on the event loop.
+_listeners: dict = {}
+_queues: dict = {}
+_lock = threading.Lock()
+
+def _get_queue(log_file: str) -> queue.Queue:
+    production = int(os.environ.get("PRODUCTION", 0)) == 1
+    destination = "cloud" if production else log_file
+
+    if (destination not in _queues.keys()):
+        if (production):
+            # Cloud logging pulls in grpc and protobuf, so it is only imported in production
+            import google.cloud.logging
+            from google.cloud.logging_v2.handlers import CloudLoggingHandler
+            client = google.cloud.logging.Client()
+            handler = CloudLoggingHandler(client)
+        else:
+            handler = logging.FileHandler(log_file)
+            handler.setFormatter(logging.Formatter('[%(asctime)s] [%(levelname)-8s] %(name)s: %(message)s', '%Y-%m-%d %H:%M:%S'))
+
+        _queues[destination] = queue.SimpleQueue()
+        _listeners[destination] = QueueListener(_queues[destination], handler)
+        _listeners[destination].start()
+
+    return _queues[destination]
 
+def setup_logger(name: str, log_file:str = '/data/discord.log', level = logging.INFO):
+    """
+    Returns the named logger, writing to log_file through a background listener. Calling it again for the same name
+    only updates the level.
+    """
     logger = logging.getLogger(name)
     logger.setLevel(level)
-    logger.addHandler(handler)
-    logger.propagate = False
+
+    with _lock:
+        if (not any(isinstance(handler, QueueHandler) for handler in logger.handlers)):
+            logger.addHandler(QueueHandler(_get_queue(log_file)))
+            logger.propagate = False
+
     return logger
+
+def stop_listeners() -> None:
+    """
+    Writes out every queued record and stops the listener threads.
+    """
+    with _lock:
+        for listener in _listeners.values():
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+        _listeners.clear()
+        _queues.clear()
+
+atexit.register(stop_listeners)
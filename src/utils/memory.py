@@ -0,0 +1,45 @@
+import os
+import json
+import resource
+
+def get_rss_bytes() -> int:
+    """
+    Returns the resident set size of this process, or its peak when the current size is not available.
+    """
+    try:
+        with open("/proc/self/status", "r") as file:
+            for line in file:
+                if (line.startswith("VmRSS:")):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+
+    # ru_maxrss is in kilobytes on linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def get_memory_report(guildCount: int, memberCount: int) -> dict:
+    rss = get_rss_bytes()
+    return {
+        "rssMB": rss / 1024 ** 2,
+        "guilds": guildCount,
+        "cachedMembers": memberCount,
+        "rssMBPer1kGuilds": rss / 1024 ** 2 / guildCount * 1000 if guildCount else None}
+
+def record_memory_report(mode: str, report: dict, path: str = None) -> dict:
+    """
+    Keeps the latest report per member cache mode in a json file and returns every recorded one,
+    so a run in one mode can be compared with the last run in the other.
+    """
+    path = path if path else os.environ.get("MEMORY_REPORT_PATH", "/data/memory_report.json")
+    reports = {}
+    if (os.path.exists(path)):
+        with open(path, "r") as file:
+            reports = json.load(file)
+
+    reports[mode] = report
+    # Clusters may record at the same time, so each writes its own temporary file
+    temporaryPath = f"{path}.{os.getpid()}.tmp"
+    with open(temporaryPath, "w") as file:
+        json.dump(reports, file)
+    os.replace(temporaryPath, path)
+    return reports
@@ -0,0 +1,156 @@
+import time
+import asyncio
+import functools
+import inspect
+from aiohttp import web
+
+from src.utils.logger import setup_logger
+
+# Metrics are kept in process and served in the Prometheus text format. Each cluster serves its own.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+_registry: list = []
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+class Metric:
+    type = "untyped"
+
+    def __init__(self, name: str, description: str, labelNames: tuple = ()):
+        self.name = name
+        self.description = description
+        self.labelNames = tuple(labelNames)
+        self._values: dict = {}
+        _registry.append(self)
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelNames)
+
+    def _formatLabels(self, key: tuple, extra: dict = None) -> str:
+        labels = [f'{name}="{_escape(value)}"' for name, value in zip(self.labelNames, key)]
+        labels += [f'{name}="{_escape(value)}"' for name, value in (extra or {}).items()]
+        return "{" + ",".join(labels) + "}" if labels else ""
+
+    def _samples(self) -> list:
+        return [(self.name, self._formatLabels(key), value) for key, value in self._values.items()]
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type}"]
+        lines += [f"{name}{labels} {value}" for name, labels, value in self._samples()]
+        return "\n".join(lines)
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(Metric):
+    type = "gauge"
+
+    def set(self, value: float, **labels) -> None:
+        self._values[self._key(labels)] = value
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, description: str, labelNames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        Metric.__init__(self, name, description, labelNames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        if (key not in self._values.keys()):
+            # Counts per bucket, then the sum and count of every observation
+            self._values[key] = [[0] * len(self.buckets), 0.0, 0]
+
+        counts = self._values[key]
+        for index, bucket in enumerate(self.buckets):
+            if (value <= bucket):
+                counts[0][index] += 1
+        counts[1] += value
+        counts[2] += 1
+
+    def _samples(self) -> list:
+        samples = []
+        for key, (counts, total, count) in self._values.items():
+            for bucket, bucketCount in zip(self.buckets, counts):
+                samples.append((f"{self.name}_bucket", self._formatLabels(key, {"le": bucket}), bucketCount))
+            samples.append((f"{self.name}_bucket", self._formatLabels(key, {"le": "+Inf"}), count))
+            samples.append((f"{self.name}_sum", self._formatLabels(key), total))
+            samples.append((f"{self.name}_count", self._formatLabels(key), count))
+        return samples
+
+COMMAND_LATENCY = Histogram("bot_command_response_seconds", "Time from invoking a command to its first response.", ("command",))
+REPOSITORY_QUERY_DURATION = Histogram("bot_repository_query_seconds", "Duration of repository methods.", ("repository", "method"))
+SCRAPER_FETCH_DURATION = Histogram("bot_scraper_fetch_seconds", "Duration of event source requests.", ("source",))
+SCRAPER_PARSE_DURATION = Histogram("bot_scraper_parse_seconds", "Duration of parsing event source responses.", ("source",))
+REMINDER_DELIVERY_LAG = Histogram("bot_reminder_delivery_lag_seconds", "Time between a reminder being due and its delivery.", buckets=LAG_BUCKETS)
+BROADCAST_MESSAGES = Counter("bot_broadcast_messages_total", "Daily update messages by result.", ("result",))
+BROADCAST_THROUGHPUT = Gauge("bot_broadcast_messages_per_second", "Messages sent per second by the last broadcast.")
+EVENT_LOOP_LAG = Histogram("bot_event_loop_lag_seconds", "How late the event loop wakes a sleeping task.")
+
+def render_metrics() -> str:
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+def timed_repository(cls):
+    """
+    Class decorator that records the duration of every public async method of a repository.
+    """
+    for name, method in list(vars(cls).items()):
+        if (name.startswith("_") or not inspect.iscoroutinefunction(method)):
+            continue
+
+        def wrap(method, name):
+            @functools.wraps(method)
+            async def timed(*args, **kwargs):
+                startedAt = time.perf_counter()
+                try:
+                    return await method(*args, **kwargs)
+                finally:
+                    REPOSITORY_QUERY_DURATION.observe(time.perf_counter() - startedAt, repository=cls.__name__, method=name)
+            return timed
+
+        setattr(cls, name, wrap(method, name))
+    return cls
+
+class MetricsServer:
+    """
+    Serves /metrics over http, and samples event loop lag while running.
+    """
+    def __init__(self, port: int, lagInterval: float = 1.0):
+        self._port = port
+        self._lagInterval = lagInterval
+        self._runner: web.AppRunner = None
+        self._lagTask: asyncio.Task = None
+        self._logger = setup_logger('bot.utils.metrics', '/data/discord.log')
+
+    async def handleMetrics(self, request: web.Request) -> web.Response:
+        return web.Response(body=render_metrics().encode("utf-8"), headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def monitorEventLoopLag(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            startedAt = loop.time()
+            await asyncio.sleep(self._lagInterval)
+            EVENT_LOOP_LAG.observe(max(loop.time() - startedAt - self._lagInterval, 0.0))
+
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get("/metrics", self.handleMetrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, port=self._port).start()
+        self._lagTask = asyncio.create_task(self.monitorEventLoopLag())
+        self._logger.info(f"Serving metrics on port {self._port}.")
+
+    async def stop(self) -> None:
+        if (self._lagTask):
+            self._lagTask.cancel()
+            self._lagTask = None
+        if (self._runner):
+            await self._runner.cleanup()
+            self._runner = None
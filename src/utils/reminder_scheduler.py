@@ -0,0 +1,93 @@
+import asyncio
+import heapq
+from datetime import datetime
+
+from src.utils.metrics import REMINDER_DELIVERY_LAG
+
+class ReminderScheduler:
+    """
+    Min-heap of reminder due dates inside the currently loaded window. Sleeps until the earliest one,
+    and wakes early when a sooner reminder is scheduled.
+    """
+    def __init__(self):
+        self._heap: list[datetime] = []
+        self._windowEnd: datetime = datetime.min
+        # Dates scheduled while the next window loads, which its query may have missed
+        self._scheduledWhileLoading: list[datetime] = None
+        self._wakeEvent = asyncio.Event()
+
+        # Delivery lag statistics, in seconds past the due date
+        self.delivered = 0
+        self.totalLag = 0.0
+        self.maxLag = 0.0
+        self.lastLag = 0.0
+
+    def beginLoad(self, windowEnd: datetime) -> None:
+        """
+        Call before querying the next window, so reminders scheduled during the query are kept by reset.
+        """
+        self._windowEnd = windowEnd
+        self._scheduledWhileLoading = []
+
+    def reset(self, dates: list[datetime], windowEnd: datetime) -> None:
+        scheduled = self._scheduledWhileLoading if self._scheduledWhileLoading else []
+        self._scheduledWhileLoading = None
+
+        # A date in both lists only causes an extra wake up, since due reminders are claimed from the database
+        self._heap = [date for date in dates + scheduled if date <= windowEnd]
+        heapq.heapify(self._heap)
+        self._windowEnd = windowEnd
+
+    def schedule(self, date: datetime) -> None:
+        # Reminders after the window are loaded with the next window
+        if (date > self._windowEnd):
+            return
+
+        if (self._scheduledWhileLoading is not None):
+            self._scheduledWhileLoading.append(date)
+
+        if (not self._heap or date < self._heap[0]):
+            self._wakeEvent.set()
+        heapq.heappush(self._heap, date)
+
+    def peek(self) -> datetime:
+        return self._heap[0] if self._heap else None
+
+    def popDue(self, date: datetime) -> int:
+        count = 0
+        while (self._heap and self._heap[0] <= date):
+            heapq.heappop(self._heap)
+            count += 1
+        return count
+
+    def getWindowEnd(self) -> datetime:
+        return self._windowEnd
+
+    async def sleepUntil(self, date: datetime) -> None:
+        """
+        Sleeps until date, or until a sooner reminder is scheduled.
+        """
+        self._wakeEvent.clear()
+        seconds = (date - datetime.utcnow()).total_seconds()
+        if (seconds <= 0):
+            return
+
+        try:
+            await asyncio.wait_for(self._wakeEvent.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def recordLag(self, seconds: float) -> None:
+        self.delivered += 1
+        self.totalLag += seconds
+        self.maxLag = max(self.maxLag, seconds)
+        self.lastLag = seconds
+        REMINDER_DELIVERY_LAG.observe(max(seconds, 0.0))
+
+    def getLagStats(self) -> dict:
+        return {
+            "delivered": self.delivered,
+            "averageLag": self.totalLag / self.delivered if self.delivered else 0.0,
+            "maxLag": self.maxLag,
+            "lastLag": self.lastLag,
+            "pending": len(self._heap)}
@@ -0,0 +1,87 @@
+import os
+import time
+import asyncio
+import weakref
+from collections import deque
+from discord.ext import commands
+
+from src.utils.metrics import COMMAND_LATENCY
+
+# Most recent time to first response, in seconds, per command
+_latencies: dict[str, deque] = {}
+_states = weakref.WeakKeyDictionary()
+
+class _ResponseState:
+    def __init__(self):
+        self.startedAt = time.monotonic()
+        self.responded = False
+        self.lock = asyncio.Lock()
+        self.deferTask: asyncio.Task = None
+
+def _record(ctx: commands.context.Context, state: _ResponseState) -> None:
+    if (state.responded):
+        return
+    state.responded = True
+
+    name = ctx.command.qualified_name if ctx.command else "unknown"
+    if (name not in _latencies.keys()):
+        _latencies[name] = deque(maxlen=1000)
+    latency = time.monotonic() - state.startedAt
+    _latencies[name].append(latency)
+    COMMAND_LATENCY.observe(latency, command=name)
+
+def get_defer_after() -> float:
+    # Interactions must be acknowledged within 3 seconds, so slow commands are deferred before then.
+    # Read on use, since this module is imported before main.py loads the environment.
+    return float(os.environ.get("RESPONSE_DEFER_AFTER", 1.5))
+
+async def _defer_later(ctx: commands.context.Context, state: _ResponseState) -> None:
+    await asyncio.sleep(get_defer_after())
+    async with state.lock:
+        if (not state.responded and not ctx.interaction.response.is_done()):
+            await ctx.defer()
+            _record(ctx, state)
+
+async def start_response_timer(ctx: commands.context.Context) -> None:
+    """
+    Before invoke hook. Starts timing the command, and schedules a deferral for slash commands that respond slowly.
+    """
+    state = _ResponseState()
+    if (ctx.interaction):
+        state.deferTask = asyncio.create_task(_defer_later(ctx, state))
+    _states[ctx] = state
+
+async def stop_response_timer(ctx: commands.context.Context) -> None:
+    """
+    After invoke hook. Cancels a deferral that has not happened yet.
+    """
+    state = _states.pop(ctx, None)
+    if (state and state.deferTask):
+        state.deferTask.cancel()
+
+async def respond(ctx: commands.context.Context, *args, **kwargs):
+    """
+    Replies to a command without a typing indicator, and records the time to first response.
+    """
+    state = _states.get(ctx, None)
+    if (not state):
+        return await ctx.reply(*args, **kwargs)
+
+    # Holding the lock keeps a deferral from racing the reply for the interaction response
+    async with state.lock:
+        message = await ctx.reply(*args, **kwargs)
+        _record(ctx, state)
+        if (state.deferTask):
+            state.deferTask.cancel()
+    return message
+
+def _percentile(values: list[float], percentile: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * percentile))]
+
+def get_latency_stats() -> dict:
+    """
+    Returns the count, p50 and p99 time to first response in seconds per command, over its most recent invocations.
+    """
+    return {name: {"count": len(values), "p50": _percentile(values, 0.5), "p99": _percentile(values, 0.99)}
+            for name, values in _latencies.items() if values}
@@ -0,0 +1,79 @@
+import os
+import json
+from datetime import datetime, timedelta
+
+from src.utils.logger import setup_logger
+
+class ScrapeScheduler:
+    """
+    Decides when event sources are next polled. The interval starts at the minimum after a change,
+    doubles with every unchanged poll up to the maximum, and is cut short just after known event boundaries.
+    The last run is persisted to a json file, so a restart does not poll again before it is due.
+    """
+    def __init__(self, path: str = None, minInterval: float = None, maxInterval: float = None, boundaryDelay: float = None):
+        self._path = path if path else os.environ.get("SCRAPE_STATE_PATH", "/data/scrape_schedule.json")
+        self._minInterval = timedelta(seconds=minInterval if minInterval else float(os.environ.get("SCRAPE_MIN_INTERVAL", 1800)))
+        self._maxInterval = timedelta(seconds=maxInterval if maxInterval else float(os.environ.get("SCRAPE_MAX_INTERVAL", 86400)))
+        self._boundaryDelay = timedelta(seconds=boundaryDelay if boundaryDelay != None else float(os.environ.get("SCRAPE_BOUNDARY_DELAY", 300)))
+        self._logger = setup_logger('bot.utils.scrapescheduler', '/data/discord.log')
+
+        self.lastRun: datetime = None
+        self.interval: timedelta = self._minInterval
+        self._retryAt: datetime = None
+        self._load()
+
+    def _load(self) -> None:
+        if (not os.path.exists(self._path)):
+            return
+
+        try:
+            with open(self._path, "r") as file:
+                state = json.load(file)
+            self.lastRun = datetime.fromisoformat(state["lastRun"]) if state["lastRun"] else None
+            self.interval = min(max(timedelta(seconds=state["interval"]), self._minInterval), self._maxInterval)
+        except Exception as e:
+            self._logger.error(e)
+            self._logger.error("Unable to load the scrape schedule, polling now.")
+
+    def _save(self) -> None:
+        try:
+            # Write to a temporary file first so a crash never leaves a partial state
+            temporaryPath = f"{self._path}.tmp"
+            with open(temporaryPath, "w") as file:
+                json.dump({"lastRun": self.lastRun.isoformat() if self.lastRun else None, "interval": self.interval.total_seconds()}, file)
+            os.replace(temporaryPath, self._path)
+        except Exception as e:
+            self._logger.error(e)
+            self._logger.error("Unable to persist the scrape schedule.")
+
+    def getNextRun(self, nextBoundary: datetime = None) -> datetime:
+        """
+        Returns when to poll next. nextBoundary is the first event start or end date after the last run,
+        as the page is most likely to change just after one.
+        """
+        if (self.lastRun == None):
+            return datetime.utcnow()
+
+        if (self._retryAt):
+            return self._retryAt
+
+        nextRun = self.lastRun + self.interval
+        if (nextBoundary and nextBoundary + self._boundaryDelay < nextRun):
+            nextRun = max(nextBoundary + self._boundaryDelay, self.lastRun + self._minInterval)
+        return nextRun
+
+    def recordRun(self, changed: bool, date: datetime = None) -> None:
+        """
+        Records a successful poll. A change resets the interval to the minimum, otherwise it backs off.
+        """
+        self.lastRun = date if date else datetime.utcnow()
+        self._retryAt = None
+        self.interval = self._minInterval if changed else min(self.interval * 2, self._maxInterval)
+        self._logger.info(f"Sources {'changed' if changed else 'unchanged'}, next poll within {self.interval.total_seconds()} seconds.")
+        self._save()
+
+    def recordFailure(self, date: datetime = None) -> None:
+        """
+        Records a failed poll. It is retried after the minimum interval without changing the backoff.
+        """
+        self._retryAt = (date if date else datetime.utcnow()) + self._minInterval
@@ -0,0 +1,103 @@
+import os
+import json
+import hashlib
+from datetime import datetime
+
+from src.utils.logger import setup_logger
+
+class ScrapeSnapshot:
+    """
+    Fingerprints of the events seen on the last scrape, kept in memory and persisted to a json file.
+    Events are identified by name and fingerprinted by their dates, so a new scrape can be reduced to what changed.
+    """
+    def __init__(self, path: str):
+        self._path = path
+        self._logger = setup_logger('bot.utils.scrapesnapshot', '/data/discord.log')
+        self._items: dict = self._load()
+        self._pending: dict = None
+
+    def _load(self) -> dict:
+        if (not os.path.exists(self._path)):
+            return {}
+
+        try:
+            with open(self._path, "r") as file:
+                return {key: {
+                    "fingerprint": item["fingerprint"],
+                    "event": {
+                        "event": item["event"],
+                        "startDate": datetime.fromisoformat(item["startDate"]),
+                        "endDate": datetime.fromisoformat(item["endDate"]) if item["endDate"] else None}}
+                    for key, item in json.load(file).items()}
+        except Exception as e:
+            self._logger.error(e)
+            self._logger.error("Unable to load the scrape snapshot, starting from an empty one.")
+            return {}
+
+    @staticmethod
+    def fingerprint(event: dict) -> str:
+        endDate = event["endDate"].isoformat() if event["endDate"] else ""
+        return hashlib.sha1(f'{event["event"]}|{event["startDate"].isoformat()}|{endDate}'.encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def _keyEvents(events: list[dict]) -> dict:
+        # The same name may be listed more than once, so repeats are numbered in page order
+        keyed = {}
+        counts = {}
+        for event in events:
+            counts[event["event"]] = counts.get(event["event"], 0) + 1
+            keyed[f'{event["event"]}#{counts[event["event"]]}'] = {"fingerprint": ScrapeSnapshot.fingerprint(event), "event": event}
+        return keyed
+
+    def diff(self, events: list[dict]) -> dict:
+        """
+        Compares events to the snapshot and returns {"added": [...], "changed": [{"previous", "current"}], "removed": [...]}.
+        The snapshot is not updated until commit is called.
+        """
+        current = self._keyEvents(events)
+        changes = {"added": [], "changed": [], "removed": []}
+
+        for key, item in current.items():
+            previous = self._items.get(key, None)
+            if (previous is None):
+                changes["added"].append(item["event"])
+            elif (previous["fingerprint"] != item["fingerprint"]):
+                changes["changed"].append({"previous": previous["event"], "current": item["event"]})
+
+        for key, item in self._items.items():
+            if (key not in current.keys()):
+                changes["removed"].append(item["event"])
+
+        self._pending = current
+        return changes
+
+    def discard(self) -> None:
+        """
+        Forgets the last diffed scrape, so a later commit cannot persist changes that were never applied.
+        """
+        self._pending = None
+
+    def commit(self) -> None:
+        """
+        Makes the last diffed scrape the snapshot, and persists it.
+        """
+        if (self._pending is None):
+            return
+
+        self._items = self._pending
+        self._pending = None
+
+        try:
+            # Write to a temporary file first so a crash never leaves a partial snapshot
+            temporaryPath = f"{self._path}.tmp"
+            with open(temporaryPath, "w") as file:
+                json.dump({key: {
+                    "fingerprint": item["fingerprint"],
+                    "event": item["event"]["event"],
+                    "startDate": item["event"]["startDate"].isoformat(),
+                    "endDate": item["event"]["endDate"].isoformat() if item["event"]["endDate"] else None}
+                    for key, item in self._items.items()}, file)
+            os.replace(temporaryPath, self._path)
+        except Exception as e:
+            self._logger.error(e)
+            self._logger.error("Unable to persist the scrape snapshot.")
@@ -1,20 +1,120 @@
 import os
+import json
 import hashlib
-from google.cloud import secretmanager
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-def access_secret_version(secret_id, version_id="latest"):
-    # Create the Secret Manager client.
-    client = secretmanager.SecretManagerServiceClient()
+from src.utils.logger import setup_logger
+
+# Secrets are read once per process. SECRETS_PROVIDER picks where from: gcp, env, or a local json file.
+_cache: dict = {}
+_lock = threading.Lock()
+_client = None
+_fileSecrets: dict = None
+_diskCacheLoaded = False
+
+def _get_provider() -> str:
+    return os.environ.get("SECRETS_PROVIDER", "gcp" if int(os.environ.get("PRODUCTION", 0)) == 1 else "env")
 
+def _get_client():
+    # The client opens a grpc channel, so one is shared by every request
+    global _client
+    with _lock:
+        if (_client is None):
+            # Only the gcp provider needs the client library, and it is slow to import
+            from google.cloud import secretmanager
+            _client = secretmanager.SecretManagerServiceClient()
+    return _client
+
+def _fetch_gcp(secret_id: str, version_id: str) -> str:
     # Build the resource name of the secret version.
     name = f"projects/{os.getenv('PROJECT_ID')}/secrets/{secret_id}/versions/{version_id}"
 
     # Access the secret version.
-    response = client.access_secret_version(name=name)
+    response = _get_client().access_secret_version(name=name)
 
     # Return the decoded payload.
     return response.payload.data.decode('UTF-8')
 
-def secret_hash(secret_value): 
+def _fetch_file(secret_id: str) -> str:
+    global _fileSecrets
+    with _lock:
+        if (_fileSecrets is None):
+            with open(os.environ.get("SECRETS_FILE", "secrets.json"), "r") as file:
+                _fileSecrets = json.load(file)
+    return _fileSecrets.get(secret_id, None)
+
+def _fetch(secret_id: str, version_id: str) -> str:
+    provider = _get_provider()
+    if (provider == "gcp"):
+        return _fetch_gcp(secret_id, version_id)
+    elif (provider == "file"):
+        return _fetch_file(secret_id)
+    return os.getenv(secret_id)
+
+def _get_fernet():
+    """
+    Returns the cipher for the disk cache, or None if it is not enabled. cryptography is only needed when it is.
+    """
+    key = os.environ.get("SECRETS_CACHE_KEY", None)
+    if (not key or _get_provider() != "gcp"):
+        return None
+
+    from cryptography.fernet import Fernet
+    return Fernet(key.encode("utf-8"))
+
+def _load_disk_cache() -> None:
+    global _diskCacheLoaded
+    if (_diskCacheLoaded):
+        return
+    _diskCacheLoaded = True
+
+    path = os.environ.get("SECRETS_CACHE_PATH", "/data/secrets.cache")
+    try:
+        fernet = _get_fernet()
+        if (fernet is None or not os.path.exists(path)):
+            return
+        with open(path, "rb") as file:
+            _cache.update(json.loads(fernet.decrypt(file.read())))
+    except Exception as e:
+        setup_logger('bot.utils.secrets', '/data/discord.log').error(f"Unable to read the secrets cache: {e}")
+
+def _save_disk_cache() -> None:
+    path = os.environ.get("SECRETS_CACHE_PATH", "/data/secrets.cache")
+    try:
+        fernet = _get_fernet()
+        if (fernet is None):
+            return
+        # Write to a temporary file first so a crash never leaves a partial cache
+        temporaryPath = f"{path}.tmp"
+        with open(temporaryPath, "wb") as file:
+            file.write(fernet.encrypt(json.dumps(_cache).encode("utf-8")))
+        os.chmod(temporaryPath, 0o600)
+        os.replace(temporaryPath, path)
+    except Exception as e:
+        setup_logger('bot.utils.secrets', '/data/discord.log').error(f"Unable to write the secrets cache: {e}")
+
+def get_secrets(secret_ids: list, version_id: str = "latest") -> dict:
+    """
+    Returns {secret_id: value} for every id. Secrets not read yet are fetched concurrently and kept for the process lifetime.
+    """
+    _load_disk_cache()
+
+    key = lambda secret_id: f"{secret_id}:{version_id}"
+    missing = [secret_id for secret_id in dict.fromkeys(secret_ids) if key(secret_id) not in _cache.keys()]
+    if (missing):
+        with ThreadPoolExecutor(max_workers=min(len(missing), 8), thread_name_prefix="secrets") as executor:
+            values = list(executor.map(lambda secret_id: _fetch(secret_id, version_id), missing))
+
+        for secret_id, value in zip(missing, values):
+            _cache[key(secret_id)] = value
+        _save_disk_cache()
+
+    return {secret_id: _cache[key(secret_id)] for secret_id in secret_ids}
+
+def access_secret_version(secret_id, version_id="latest"):
+    return get_secrets([secret_id], version_id)[secret_id]
+
+def secret_hash(secret_value):
   # return the sha224 hash of the secret value
-  return hashlib.sha224(bytes(secret_value, "utf-8")).hexdigest()
\ No newline at end of file
+  return hashlib.sha224(bytes(secret_value, "utf-8")).hexdigest()
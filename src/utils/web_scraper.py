@@ -1,86 +1,190 @@
-from bs4 import BeautifulSoup
-import requests
+import os
+import re
+import time
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
+from src.utils.http_client import HttpClient
+from src.utils.scrape_snapshot import ScrapeSnapshot
 from src.utils.logger import setup_logger
+from src.utils.metrics import SCRAPER_FETCH_DURATION, SCRAPER_PARSE_DURATION
+
+# Returned by WebScraper.scrape_crunchyroll_events when the page is unchanged, since an empty list is a valid scrape
+NOT_MODIFIED = object()
 
 class WebScraper:
-    @staticmethod
-    async def scrape_crunchyroll_events():
-        logger = setup_logger('bot.utils.webscraper', '/data/discord.log')
-
-        url = "https://got.cr/priconne-update"
-        req = requests.get(url)
-        if (not req.ok):
-            logger.error("Crunchyroll page request failed.")
+    def __init__(self, httpClient: HttpClient = None):
+        self._url = os.environ.get("CRUNCHYROLL_URL", "https://got.cr/priconne-update")
+        self._httpClient = httpClient if httpClient else HttpClient()
+        self._ownsHttpClient = httpClient is None
+        self._logger = setup_logger('bot.utils.webscraper', '/data/discord.log')
+
+        # Parsing is CPU bound, so it runs in a worker pool instead of on the event loop
+        self._executorType = os.environ.get("SCRAPER_EXECUTOR", "process")
+        self._workers = int(os.environ.get("SCRAPER_WORKERS", 1))
+        self._executor: Executor = None
+
+        # Validators of the last scraped page, committed with the snapshot once its events are stored
+        self._pendingValidators: dict = None
+        self._snapshot = ScrapeSnapshot(os.environ.get("SCRAPER_SNAPSHOT_PATH", "/data/scraper_snapshot.json"))
+
+    def _getExecutor(self) -> Executor:
+        if (self._executor is None):
+            if (self._executorType == "thread"):
+                self._executor = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="scraper")
+            else:
+                # Forking a process with a running event loop, open sockets and log listener threads can deadlock the workers
+                self._executor = ProcessPoolExecutor(max_workers=self._workers, mp_context=multiprocessing.get_context("spawn"))
+        return self._executor
+
+    async def close(self) -> None:
+        # A shared client is closed by whoever created it
+        if (self._ownsHttpClient):
+            await self._httpClient.close()
+        if (self._executor is not None):
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def scrape_crunchyroll_events(self):
+        """
+        Returns the events on the crunchyroll page, NOT_MODIFIED if the page has not changed since the last scrape, or None on failure.
+        """
+        startedAt = time.perf_counter()
+        response = await self._httpClient.fetch(self._url)
+        SCRAPER_FETCH_DURATION.observe(time.perf_counter() - startedAt, source="crunchyroll")
+        if (not response):
+            self._logger.error("Crunchyroll page request failed.")
+            return None
+
+        if (response["notModified"]):
+            self._logger.info("Crunchyroll page has not changed since the last scrape.")
+            return NOT_MODIFIED
+
+        if (response["status"] >= 400):
+            self._logger.error(f"Crunchyroll page request failed with status {response['status']}.")
             return None
 
-        soup = BeautifulSoup(req.content, 'html.parser')
-        
-        content = soup.select('div.contents > ul')
+        startedAt = time.perf_counter()
+        events, messages = await asyncio.get_running_loop().run_in_executor(self._getExecutor(), parse_crunchyroll_events, response["content"])
+        SCRAPER_PARSE_DURATION.observe(time.perf_counter() - startedAt, source="crunchyroll")
+        for level, message in messages:
+            self._logger.log(level, message)
+
+        if (events == None):
+            self._logger.error("crunchyroll page contains no content.")
+            return None
+
+        if (not events):
+            self._logger.error("crunchyroll page lists no events that could be read. Possible new web format.")
+
+        self._pendingValidators = response["validators"]
+        return events
+
+    async def scrape_crunchyroll_changes(self) -> dict:
+        """
+        Returns the events added, changed or removed since the last committed scrape, or None on failure.
+        Call commit_snapshot once the changes have been applied.
+        """
+        # Only a diff made by this scrape may be committed
+        self._snapshot.discard()
+        self._pendingValidators = None
 
-        if(not content):
-            logger.error("crunchyroll page contains no content.")
+        events = await self.scrape_crunchyroll_events()
+        if (events == None):
             return None
 
-        
-        events = []
-        
-        # Iterate through event and create dictionary
-        for li in content[-1].find_all('li', recursive=False):
-            try:
-                event = li.find(text = True).strip()
-                
-                # Find opening bracket for date
-                startingBracket = -1
-                for i in range(len(event)-1,-1,-1):
-                    if (event[i] == "("):
-                        startingBracket = i
-                        break
-                
-                # Split crunchyroll event string into 2 parts
-                eventName, date = event[0:startingBracket].lstrip().rstrip(), event[startingBracket:].strip("(").strip(")").split()
-                
-                # Check if it's a proper date: (MM/DD/YYYY TIME UTC) or (MM/DD TIME UTC)
-                if (date and (date[0].count("/") < 1 or len(date) < 3 or date[0].count("/") > 2)):
-                    logger.info("Possible new date or web format.")
-                    continue
-
-                # Add seconds to date
-                if (date[1].count(":")==1):
-                    date[1] += ":00"
-
-                # Add current year to date if it does not exist, because it defaults to 1900
-                if (date[0].count('/') == 1):
-                    date[0] += "/" + str(datetime.now().year)
-
-                startDateString = " ".join(date[0:2])
-
-                # Convert date string to datetime format
-                startDate = datetime.strptime(startDateString, '%m/%d/%Y %H:%M:%S')
-
-
-                # Check if there's an end date
-                if (len(date) == 7 and date[0].count("/") >= 1 and date[-3].count("/") >= 1):
-                    
-                    # Add seconds to date
-                    if (date[-2].count(":")==1):
-                        date[-2] += ":00"
-
-                    # Add current year to date if it does not exist, because it defaults to 1900
-                    if (date[-3].count("/")==1):
-                        date[-3] += "/" + str(datetime.now().year)
-                    
-                    endDateString = " ".join(date[4:-1])
-
-                    # Convert date string to datetime format
-                    endDate = datetime.strptime(endDateString, '%m/%d/%Y %H:%M:%S')
-                else:
-                    endDate = None
-
-                eventDetails = {"event": eventName, "startDate": startDate, "endDate": endDate}
-                events.append(eventDetails)
-            except Exception as e:
-                logger.error(e)
-                logger.error("Something went wrong with creating event. Possible new web format.")
-        
-        return events
\ No newline at end of file
+        # An unchanged page is not parsed at all
+        if (events is NOT_MODIFIED):
+            return {"added": [], "changed": [], "removed": []}
+
+        changes = self._snapshot.diff(events)
+        self._logger.info(f"Crunchyroll page has {len(changes['added'])} added, {len(changes['changed'])} changed and {len(changes['removed'])} removed events.")
+        return changes
+
+    def commit_snapshot(self) -> None:
+        self._snapshot.commit()
+        self._httpClient.commitValidators(self._url, self._pendingValidators)
+        self._pendingValidators = None
+
+# Dates look like MM/DD or MM/DD/YYYY, and times like HH:MM or HH:MM:SS
+DATE_PATTERN = re.compile(r"(\d{1,2})/(\d{1,2})(?:/(\d{4}))?")
+TIME_PATTERN = re.compile(r"(\d{1,2}):(\d{1,2})(?::(\d{1,2}))?")
+
+def _has_contents_class(value) -> bool:
+    # The class attribute has not been split into a list yet while the strainer runs
+    if (not value):
+        return False
+    return "contents" in (value.split() if type(value) == str else value)
+
+# Only the page's content container is parsed into a tree. bs4 and lxml are imported on the first parse, in the worker.
+_contentStrainer = None
+
+def get_content_strainer():
+    global _contentStrainer
+    if (_contentStrainer is None):
+        from bs4 import SoupStrainer
+        _contentStrainer = SoupStrainer("div", class_=_has_contents_class)
+    return _contentStrainer
+
+def parse_date(date: str, time: str, year: int) -> datetime:
+    """
+    Converts date and time tokens from the crunchyroll page to a datetime. Dates without a year are given year.
+    """
+    dateMatch = DATE_PATTERN.fullmatch(date)
+    timeMatch = TIME_PATTERN.fullmatch(time)
+    if (not dateMatch or not timeMatch):
+        raise ValueError(f"time data '{date} {time}' does not match a crunchyroll date format")
+
+    month, day, dateYear = dateMatch.groups()
+    hour, minute, second = timeMatch.groups()
+    return datetime(int(dateYear) if dateYear else year, int(month), int(day), int(hour), int(minute), int(second) if second else 0)
+
+def parse_crunchyroll_events(content: bytes, year: int = None) -> tuple:
+    """
+    Parses the events listed on the crunchyroll page. Returns the events, or None if the page has no event list,
+    along with (level, message) pairs for the caller to log. Everything returned is plain data.
+    Dates without a year are given year, the current one by default.
+    """
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(content, 'lxml', parse_only=get_content_strainer())
+    
+    content = soup.select('div.contents > ul')
+
+    if(not content):
+        return None, []
+
+    events = []
+    messages = []
+    year = year if year else datetime.now().year
+    
+    # Iterate through event and create dictionary
+    for li in content[-1].find_all('li', recursive=False):
+        try:
+            event = li.find(text = True).strip()
+            
+            # Split crunchyroll event string into 2 parts at the last opening bracket
+            startingBracket = event.rfind("(")
+            eventName, date = event[0:startingBracket].lstrip().rstrip(), event[startingBracket:].strip("(").strip(")").split()
+            
+            # Check if it's a proper date: (MM/DD/YYYY TIME UTC) or (MM/DD TIME UTC)
+            if (date and (date[0].count("/") < 1 or len(date) < 3 or date[0].count("/") > 2)):
+                messages.append((logging.INFO, "Possible new date or web format."))
+                continue
+
+            startDate = parse_date(date[0], date[1], year)
+
+            # Check if there's an end date
+            if (len(date) == 7 and date[0].count("/") >= 1 and date[-3].count("/") >= 1):
+                endDate = parse_date(date[-3], date[-2], year)
+            else:
+                endDate = None
+
+            eventDetails = {"event": eventName, "startDate": startDate, "endDate": endDate}
+            events.append(eventDetails)
+        except Exception as e:
+            messages.append((logging.ERROR, str(e)))
+            messages.append((logging.ERROR, "Something went wrong with creating event. Possible new web format."))
+    
+    return events, messages